@@ -1,6 +1,6 @@
 {
     'name': 'Property Management Lite',
-    'version': '18.0.1.0.0',
+    'version': '18.0.1.1.0',
     'category': 'Real Estate',
     'summary': 'Complete Property & Room Rental Management System with Advanced Financial Tracking',
     'description': """
@@ -52,6 +52,9 @@ Optimized for Dubai real estate market with AED currency support.
         'sale',
         'account',
     ],
+    'external_dependencies': {
+        'python': ['xlsxwriter'],
+    },
     'data': [
         # Security
         'security/property_security.xml',
@@ -65,11 +68,13 @@ Optimized for Dubai real estate market with AED currency support.
         'data/scheduled_actions.xml',
         'data/cron_recompute_outstanding_dues.xml',
         'data/cron_update_outstanding_dues.xml',
+        'data/cron_rollover_outstanding_status.xml',
         'data/cron_generate_statement_entries.xml',
         'data/cron_update_statement_entries.xml',
         'data/cron_create_collection_statements.xml',
         'data/cron_cleanup_statement_entries.xml',
         'data/cron_recalculate_balances.xml',
+        'data/cron_archive_statement_entries.xml',
         'data/email_templates.xml',
         
         # Views - Dashboard
@@ -84,6 +89,7 @@ Optimized for Dubai real estate market with AED currency support.
         'views/agreement_views.xml',
         'views/tenant_views.xml',
         'views/collection_views.xml',
+        'views/bank_import_views.xml',
         'views/invoice_views.xml',
         'views/statement_views.xml',
         'views/outstanding_dues_views.xml',
@@ -95,10 +101,13 @@ Optimized for Dubai real estate market with AED currency support.
         # Wizards
         'wizards/property_data_import_wizard_views.xml',
         'wizards/property_deposit_adjust_wizard_views.xml', # New Wizard
+        'wizards/property_collection_bulk_wizard_views.xml',
+        'wizards/property_outstanding_projection_wizard_views.xml',
         'views/statement_wizard_views.xml',  # Fixed path
         
         # Report templates
         'reports/invoice_reports.xml',
+        'reports/statement_reports.xml',
         
         # Email Templates (must come before views that reference them)
         'data/email_templates.xml',
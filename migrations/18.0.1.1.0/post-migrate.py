@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""Rebuild running balances of tenants whose duplicate statement entries were removed."""
+import logging
+
+from odoo import api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    cr.execute("SELECT to_regclass('property_statement_dedup_tenant')")
+    if not cr.fetchone()[0]:
+        return
+
+    cr.execute("SELECT tenant_id FROM property_statement_dedup_tenant")
+    tenant_ids = [row[0] for row in cr.fetchall()]
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['property.statement'].rebuild_running_balances(tenant_ids)
+    env['property.tenant']._invalidate_statement_totals(tenant_ids)
+    cr.execute("DROP TABLE property_statement_dedup_tenant")
+    _logger.info(f"Rebuilt running balances of {len(tenant_ids)} tenants after statement deduplication")
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""Remove duplicate statement entries before unique_agreement_transaction is added.
+
+Older versions could store the same (agreement_id, reference) twice. The
+constraint cannot be created while such rows exist, and without it the
+ON CONFLICT DO NOTHING inserts no longer deduplicate.
+
+Other charge entries are first re-keyed on the agreement charge line, as the
+current schedule builds them. Within each remaining duplicate group the row
+linked to a collection is kept, otherwise the oldest one. Other rows linked
+to a collection are real payments sharing a receipt number: they get their
+own ``COL/<collection_id>`` reference instead of being removed. Only
+unlinked duplicates are deleted; tenants whose ledger lost rows are recorded
+so the post-migration can rebuild their running balances.
+"""
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    # Collections of type 'other' were stored with a type outside the selection
+    cr.execute("UPDATE property_statement SET transaction_type = 'other' WHERE transaction_type = 'other_charges'")
+    if cr.rowcount:
+        _logger.info(f"Fixed the transaction type of {cr.rowcount} statement entries")
+
+    # Other charges were keyed on the charge name; key them on the charge line
+    # wherever the name identifies a single line of the agreement
+    cr.execute("""
+        WITH unique_line AS (
+            SELECT agreement_id, charge_name, min(id) AS line_id
+              FROM property_agreement_charges
+             WHERE charge_name IS NOT NULL
+          GROUP BY agreement_id, charge_name
+            HAVING count(*) = 1
+        )
+        UPDATE property_statement s
+           SET reference = CASE
+                   WHEN s.reference = a.name || '/CHARGE/' || l.charge_name
+                       THEN a.name || '/CHARGE/' || l.line_id
+                   ELSE 'AGR/' || s.agreement_id || '/CHARGE/' || l.line_id || right(s.reference, 7)
+               END
+          FROM unique_line l, property_agreement a
+         WHERE l.agreement_id = s.agreement_id
+           AND a.id = s.agreement_id
+           AND s.transaction_type = 'other'
+           AND (s.reference = a.name || '/CHARGE/' || l.charge_name
+                OR (s.reference = 'AGR/' || s.agreement_id || '/CHARGE/' || l.charge_name || right(s.reference, 7)
+                    AND right(s.reference, 7) ~ '^/[0-9]{6}$'))
+    """)
+    if cr.rowcount:
+        _logger.info(f"Re-keyed {cr.rowcount} other charge statement entries on their charge line")
+
+    cr.execute("""
+        CREATE TEMP TABLE property_statement_duplicate ON COMMIT DROP AS
+        SELECT id, keep_id, tenant_id, agreement_id, collection_id
+          FROM (
+              SELECT id,
+                     tenant_id,
+                     agreement_id,
+                     collection_id,
+                     first_value(id) OVER w AS keep_id,
+                     row_number() OVER w AS rn
+                FROM property_statement
+               WHERE agreement_id IS NOT NULL
+              WINDOW w AS (PARTITION BY agreement_id, reference
+                           ORDER BY collection_id IS NULL, id)
+          ) ranked
+         WHERE rn > 1
+    """)
+
+    # Payments of distinct collections that shared a receipt number are kept
+    # under their own reference; a collection with several such rows gets the
+    # row id appended so the new references cannot collide either
+    cr.execute("""
+        WITH renamed AS (
+            SELECT id, agreement_id, collection_id,
+                   row_number() OVER (PARTITION BY agreement_id, collection_id ORDER BY id) AS rn
+              FROM property_statement_duplicate
+             WHERE collection_id IS NOT NULL
+        )
+        UPDATE property_statement s
+           SET reference = CASE
+                   WHEN r.rn = 1 AND NOT EXISTS (
+                       SELECT 1
+                         FROM property_statement o
+                        WHERE o.agreement_id = r.agreement_id
+                          AND o.reference = 'COL/' || r.collection_id
+                   ) THEN 'COL/' || r.collection_id
+                   ELSE 'COL/' || r.collection_id || '/' || r.id
+               END
+          FROM renamed r
+         WHERE s.id = r.id
+    """)
+    if cr.rowcount:
+        _logger.info(f"Gave {cr.rowcount} collection statement entries sharing a receipt number their own reference")
+    cr.execute("DELETE FROM property_statement_duplicate WHERE collection_id IS NOT NULL")
+
+    cr.execute("SELECT count(*) FROM property_statement_duplicate")
+    duplicate_count = cr.fetchone()[0]
+    if not duplicate_count:
+        return
+
+    # Collections pointing at a removed duplicate follow the kept row
+    cr.execute("""
+        UPDATE property_collection c
+           SET statement_id = d.keep_id
+          FROM property_statement_duplicate d
+         WHERE c.statement_id = d.id
+    """)
+    cr.execute("""
+        DELETE FROM property_statement s
+         USING property_statement_duplicate d
+         WHERE s.id = d.id
+    """)
+    cr.execute("""
+        CREATE TABLE IF NOT EXISTS property_statement_dedup_tenant (tenant_id integer PRIMARY KEY);
+        INSERT INTO property_statement_dedup_tenant (tenant_id)
+        SELECT DISTINCT tenant_id FROM property_statement_duplicate WHERE tenant_id IS NOT NULL
+        ON CONFLICT DO NOTHING
+    """)
+    _logger.info(f"Removed {duplicate_count} duplicate statement entries before adding unique_agreement_transaction")
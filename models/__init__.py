@@ -6,8 +6,13 @@ from . import property_tenant
 from . import property_occupant
 from . import property_agreement
 from . import property_collection
+from . import property_payment_journal
+from . import property_bank_import
 from . import property_invoice
 from . import property_dashboard
 from . import property_other_charges
 from . import property_outstanding_dues
+from . import property_outstanding_aging
 from . import property_statement
+from . import property_statement_snapshot
+from . import property_statement_archive
@@ -152,6 +152,8 @@ class PropertyAgreement(models.Model):
     
     # Archive
     active = fields.Boolean('Active', default=True)
+    termination_date = fields.Date('Termination Date', readonly=True, copy=False,
+                                   help="Date the agreement was terminated; drives statement archival")
     
     # Documents
     agreement_document = fields.Binary('Agreement Document')
@@ -298,83 +300,75 @@ class PropertyAgreement(models.Model):
             # Create monthly invoice reference
             record._create_monthly_invoice_reference()
             
-            # Trigger recomputation of outstanding dues
-            self.env['property.outstanding.dues'].recompute_for_tenant(record.tenant_id.id)
+            # Queue recomputation of outstanding dues
+            self.env['property.outstanding.dues'].queue_recompute([record.tenant_id.id])
     
     def _create_initial_statement_entries(self):
         """Create initial statement entries for agreement dues"""
         self.ensure_one()
         
-        statement_obj = self.env['property.statement']
         today = fields.Date.today()
+        common = {
+            'tenant_id': self.tenant_id.id,
+            'agreement_id': self.id,
+            'transaction_date': today,
+            'credit_amount': 0.0,
+        }
+        vals_list = []
         
         # 1. Create entry for opening balance (if > 0 and not already recorded)
         if self.opening_balance > 0 and not self.opening_balance_recorded:
-            statement_obj.create({
-                'tenant_id': self.tenant_id.id,
-                'agreement_id': self.id,
-                'transaction_date': today,
-                'reference': f'{self.name}/OPENING',
-                'description': f'Opening balance for agreement {self.name}',
-                'transaction_type': 'outstanding',
-                'debit_amount': self.opening_balance,
-                'credit_amount': 0.0,
-            })
-            # Mark as recorded so it doesn't get created again
-            self.opening_balance_recorded = True
+            vals_list.append(dict(common,
+                reference=f'{self.name}/OPENING',
+                description=f'Opening balance for agreement {self.name}',
+                transaction_type='outstanding',
+                debit_amount=self.opening_balance,
+            ))
         
         # 2. Create entry for security deposit (if not paid)
         if self.deposit_amount > 0:
-            statement_obj.create({
-                'tenant_id': self.tenant_id.id,
-                'agreement_id': self.id,
-                'transaction_date': today,
-                'reference': f'{self.name}/DEPOSIT',
-                'description': f'Security deposit for agreement {self.name}',
-                'transaction_type': 'deposit',
-                'debit_amount': self.deposit_amount,
-                'credit_amount': 0.0,
-            })
+            vals_list.append(dict(common,
+                reference=f'{self.name}/DEPOSIT',
+                description=f'Security deposit for agreement {self.name}',
+                transaction_type='deposit',
+                debit_amount=self.deposit_amount,
+            ))
         
         # 3. Create entry for parking charges (if > 0)
         if self.parking_charges > 0:
-            statement_obj.create({
-                'tenant_id': self.tenant_id.id,
-                'agreement_id': self.id,
-                'transaction_date': today,
-                'reference': f'{self.name}/PARKING',
-                'description': f'Parking charges for agreement {self.name}',
-                'transaction_type': 'parking',
-                'debit_amount': self.parking_charges,
-                'credit_amount': 0.0,
-            })
+            vals_list.append(dict(common,
+                reference=f'{self.name}/PARKING',
+                description=f'Parking charges for agreement {self.name}',
+                transaction_type='parking',
+                debit_amount=self.parking_charges,
+            ))
         
         # Create entry for parking remote deposit (if > 0)
         if self.parking_remote_deposit > 0:
-            statement_obj.create({
-                'tenant_id': self.tenant_id.id,
-                'agreement_id': self.id,
-                'transaction_date': today,
-                'reference': f'{self.name}/REMOTE_DEPOSIT',
-                'description': f'Parking remote deposit for agreement {self.name}',
-                'transaction_type': 'deposit',
-                'debit_amount': self.parking_remote_deposit,
-                'credit_amount': 0.0,
-            })
+            vals_list.append(dict(common,
+                reference=f'{self.name}/REMOTE_DEPOSIT',
+                description=f'Parking remote deposit for agreement {self.name}',
+                transaction_type='deposit',
+                debit_amount=self.parking_remote_deposit,
+            ))
         
         # 4. Create entries for other charges (if > 0)
         for charge in self.other_charges_ids:
             if charge.amount > 0:
-                statement_obj.create({
-                    'tenant_id': self.tenant_id.id,
-                    'agreement_id': self.id,
-                    'transaction_date': today,
-                    'reference': f'{self.name}/CHARGE/{charge.charge_id.name}',
-                    'description': f'{charge.charge_id.name} for agreement {self.name}',
-                    'transaction_type': 'other',
-                    'debit_amount': charge.amount,
-                    'credit_amount': 0.0,
-                })
+                vals_list.append(dict(common,
+                    reference=f'{self.name}/CHARGE/{charge.id}',
+                    description=f'{charge.charge_id.name} for agreement {self.name}',
+                    transaction_type='other',
+                    debit_amount=charge.amount,
+                ))
+        
+        if vals_list:
+            # Entries already present for the agreement (e.g. re-activation) are skipped
+            self.env['property.statement'].insert_or_skip(vals_list)
+        
+        if self.opening_balance > 0 and not self.opening_balance_recorded:
+            # Mark as recorded so it doesn't get created again
+            self.opening_balance_recorded = True
     
     def action_terminate(self):
         """Regular termination - just marks agreement as terminated"""
@@ -391,10 +385,10 @@ class PropertyAgreement(models.Model):
                 'current_room_id': False,
             })
             
-            record.write({'state': 'terminated'})
+            record.write({'state': 'terminated', 'termination_date': fields.Date.today()})
             
-            # Trigger recomputation of outstanding dues
-            self.env['property.outstanding.dues'].recompute_for_tenant(record.tenant_id.id)
+            # Queue recomputation of outstanding dues
+            self.env['property.outstanding.dues'].queue_recompute([record.tenant_id.id])
         return True
     
     def action_clean_and_terminate(self):
@@ -530,9 +524,7 @@ class PropertyAgreement(models.Model):
                 tenants_to_recompute._compute_agreement_stats()
         
         if any(f in vals for f in ['rent_amount', 'deposit_amount', 'parking_charges', 'active', 'state']):
-            for record in self:
-                if record.tenant_id:
-                    self.env['property.outstanding.dues'].recompute_for_tenant(record.tenant_id.id)
+            self.env['property.outstanding.dues'].queue_recompute(self.mapped('tenant_id').ids)
         
         return result
     
@@ -0,0 +1,475 @@
+# -*- coding: utf-8 -*-
+
+import base64
+import csv
+import io
+import re
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from lxml import etree
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from odoo.tools import float_compare
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class PropertyBankImport(models.Model):
+    _name = 'property.bank.import'
+    _description = 'Bank Statement Import'
+    _order = 'create_date desc, id desc'
+
+    name = fields.Char('Name', required=True, default=lambda self: _('Bank Statement %s', fields.Date.today()))
+    bank_id = fields.Many2one('res.bank', 'Bank')
+    data_file = fields.Binary('Statement File', attachment=True)
+    filename = fields.Char('Filename')
+    file_format = fields.Selection([
+        ('csv', 'CSV'),
+        ('camt', 'CAMT.053 (XML)'),
+    ], string='File Format', required=True, default='csv')
+    confidence_threshold = fields.Float('Auto-match Confidence', default=0.8,
+                                        help="Lines scoring at least this much against a single candidate are proposed as matched")
+    date_window = fields.Integer('Date Window (days)', default=7,
+                                 help="How far apart bank and collection dates may be to count as the same payment")
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('matched', 'Matched'),
+        ('done', 'Done'),
+    ], string='Status', default='draft')
+    line_ids = fields.One2many('property.bank.import.line', 'import_id', string='Statement Lines')
+
+    line_count = fields.Integer('Lines', compute='_compute_line_counts')
+    proposed_count = fields.Integer('Proposed', compute='_compute_line_counts')
+    ambiguous_count = fields.Integer('To Review', compute='_compute_line_counts')
+    unmatched_count = fields.Integer('Unmatched', compute='_compute_line_counts')
+    confirmed_count = fields.Integer('Confirmed', compute='_compute_line_counts')
+
+    # Collection payment methods that show up on a bank statement
+    _BANK_PAYMENT_METHODS = ['bank_transfer', 'cheque', 'online', 'card']
+
+    # Header spellings accepted for each CSV column
+    _CSV_COLUMNS = {
+        'date': ('date', 'transaction date', 'booking date', 'value date', 'posting date'),
+        'amount': ('amount', 'credit', 'credit amount', 'deposit', 'deposits'),
+        'debit': ('debit', 'debit amount', 'withdrawal', 'withdrawals'),
+        'reference': ('reference', 'ref', 'transaction id', 'cheque number', 'cheque no'),
+        'description': ('description', 'details', 'narrative', 'remarks', 'particulars'),
+        'counterparty': ('counterparty', 'name', 'payer', 'remitter'),
+    }
+    _CSV_DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y', '%m/%d/%Y', '%d %b %Y')
+
+    # Score contributed by each kind of agreement between a line and a candidate
+    _SCORE_REFERENCE = 0.6
+    _SCORE_AMOUNT = 0.3
+    _SCORE_DATE = 0.1
+    # Best candidate must beat the runner-up by this much to be proposed
+    _SCORE_MARGIN = 0.1
+    _REVIEW_CANDIDATES = 5
+    # Open invoices issued this long before the statement are still matched
+    _INVOICE_LOOKBACK_DAYS = 120
+
+    @api.depends('line_ids.match_state')
+    def _compute_line_counts(self):
+        counts = defaultdict(int)
+        for bank_import, match_state, count in self.env['property.bank.import.line']._read_group(
+            [('import_id', 'in', self.ids)], ['import_id', 'match_state'], ['__count'],
+        ):
+            counts[(bank_import.id, match_state)] = count
+        for record in self:
+            record.proposed_count = counts[(record.id, 'proposed')]
+            record.ambiguous_count = counts[(record.id, 'ambiguous')]
+            record.unmatched_count = counts[(record.id, 'unmatched')]
+            record.confirmed_count = counts[(record.id, 'confirmed')]
+            record.line_count = sum(
+                counts[(record.id, state)] for state in ['proposed', 'ambiguous', 'unmatched', 'confirmed']
+            )
+
+    def action_import(self):
+        """Parse the statement file, match every line and store the result"""
+        self.ensure_one()
+        if not self.data_file:
+            raise UserError(_('Please upload a statement file first.'))
+        start = time.perf_counter()
+
+        data = base64.b64decode(self.data_file)
+        if self.file_format == 'camt':
+            rows = list(self._parse_camt(data))
+        else:
+            rows = list(self._parse_csv(data))
+        if not rows:
+            raise UserError(_('No incoming payments were found in the statement file.'))
+
+        matches = self._match_rows(rows)
+        self.line_ids.unlink()
+        self.env['property.bank.import.line'].create([
+            dict(row, import_id=self.id, **match) for row, match in zip(rows, matches)
+        ])
+        self.state = 'matched'
+        _logger.info(f"Bank import {self.name}: {len(rows)} lines matched in {time.perf_counter() - start:.2f}s")
+        return True
+
+    def action_rematch(self):
+        """Match the lines that are not confirmed yet again, e.g. after new collections were entered"""
+        self.ensure_one()
+        lines = self.line_ids.filtered(lambda l: l.match_state != 'confirmed')
+        rows = [{
+            'date': line.date,
+            'amount': line.amount,
+            'reference': line.reference,
+            'description': line.description,
+        } for line in lines]
+        confirmed = self.line_ids.filtered(lambda l: l.match_state == 'confirmed')
+        matches = self._match_rows(rows, confirmed.collection_id.ids, confirmed.invoice_id.ids)
+        for line, match in zip(lines, matches):
+            line.write(match)
+        return True
+
+    def action_confirm_matches(self):
+        """Confirm every proposed line, verifying the matched collections together"""
+        self.ensure_one()
+        self.line_ids.filtered(lambda l: l.match_state == 'proposed').action_confirm()
+        if not self.line_ids.filtered(lambda l: l.match_state in ['proposed', 'ambiguous']):
+            self.state = 'done'
+        return True
+
+    # ---------------------------------------------------------------
+    # Parsing
+    # ---------------------------------------------------------------
+
+    def _parse_csv(self, data):
+        """Yield incoming payments of a CSV statement as line values"""
+        text = io.TextIOWrapper(io.BytesIO(data), encoding='utf-8-sig', newline='')
+        sample = text.read(4096)
+        text.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t|')
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.DictReader(text, dialect=dialect)
+
+        headers = {(header or '').strip().lower(): header for header in reader.fieldnames or []}
+        columns = {
+            column: next((headers[alias] for alias in aliases if alias in headers), None)
+            for column, aliases in self._CSV_COLUMNS.items()
+        }
+        if not columns['date'] or not columns['amount']:
+            raise UserError(_('The CSV file needs at least a date and an amount (or credit) column.'))
+
+        for row_number, row in enumerate(reader, start=2):
+            def value(column):
+                return (row.get(columns[column]) or '').strip() if columns[column] else ''
+
+            amount = self._parse_amount(value('amount'))
+            if not amount or amount <= 0:
+                # Outgoing payments and blank rows are not collections
+                continue
+            date = self._parse_date(value('date'))
+            if not date:
+                raise UserError(_('Line %(line)s: unrecognised date "%(date)s".', line=row_number, date=value('date')))
+            yield {
+                'date': date,
+                'amount': amount,
+                'reference': value('reference'),
+                'description': value('description'),
+                'counterparty': value('counterparty'),
+            }
+
+    def _parse_camt(self, data):
+        """Yield credit entries of a CAMT.053 statement as line values
+
+        Entries are read one at a time and discarded, so large files are
+        never held in memory as a whole tree.
+        """
+        try:
+            for __, entry in etree.iterparse(io.BytesIO(data), events=('end',), tag='{*}Ntry',
+                                             resolve_entities=False, no_network=True):
+                if entry.findtext('{*}CdtDbtInd') == 'CRDT':
+                    date = (entry.findtext('{*}BookgDt/{*}Dt') or entry.findtext('{*}ValDt/{*}Dt')
+                            or (entry.findtext('{*}BookgDt/{*}DtTm') or '')[:10])
+                    reference = next((
+                        ref for ref in (
+                            entry.findtext('.//{*}Refs/{*}EndToEndId'),
+                            entry.findtext('.//{*}Refs/{*}TxId'),
+                            entry.findtext('.//{*}CdtrRefInf/{*}Ref'),
+                            entry.findtext('{*}AcctSvcrRef'),
+                        ) if ref and ref != 'NOTPROVIDED'
+                    ), '')
+                    description = ' '.join(filter(None, [
+                        *(node.text for node in entry.iterfind('.//{*}RmtInf/{*}Ustrd')),
+                        entry.findtext('{*}AddtlNtryInf'),
+                    ]))
+                    counterparty = (entry.findtext('.//{*}RltdPties/{*}Dbtr/{*}Nm')
+                                    or entry.findtext('.//{*}RltdPties/{*}Dbtr/{*}Pty/{*}Nm') or '')
+                    if not date:
+                        raise UserError(_('Statement entry %s has no booking date.', reference or '?'))
+                    yield {
+                        'date': fields.Date.to_date(date),
+                        'amount': self._parse_amount(entry.findtext('{*}Amt')),
+                        'reference': reference,
+                        'description': description,
+                        'counterparty': counterparty,
+                    }
+                # Free the entry and everything parsed before it
+                entry.clear()
+                while entry.getprevious() is not None:
+                    del entry.getparent()[0]
+        except etree.XMLSyntaxError as e:
+            raise UserError(_('The CAMT file could not be read: %s', e))
+
+    @api.model
+    def _parse_amount(self, text):
+        """Read an amount written with either a decimal point or a decimal comma
+
+        The separator appearing last is the decimal one ("1.234,56" and
+        "1,234.56" both give 1234.56), except a lone comma followed by exactly
+        three digits, which groups thousands ("1,234").
+        """
+        if not text:
+            return 0.0
+        text = re.sub(r"[\s'\u00a0]", '', text)
+        last_comma, last_dot = text.rfind(','), text.rfind('.')
+        decimal_comma = last_comma > last_dot and (
+            last_dot != -1 or (text.count(',') == 1 and len(text) - last_comma - 1 != 3)
+        )
+        if decimal_comma:
+            text = text.replace('.', '').replace(',', '.')
+        else:
+            text = text.replace(',', '')
+        try:
+            return float(text)
+        except ValueError:
+            return 0.0
+
+    @api.model
+    def _parse_date(self, text):
+        for date_format in self._CSV_DATE_FORMATS:
+            try:
+                return datetime.strptime(text, date_format).date()
+            except ValueError:
+                continue
+        return None
+
+    # ---------------------------------------------------------------
+    # Matching
+    # ---------------------------------------------------------------
+
+    @api.model
+    def _normalize_reference(self, text):
+        return re.sub(r'[^A-Z0-9]', '', (text or '').upper())
+
+    @api.model
+    def _amount_key(self, amount):
+        return round(amount or 0.0, 2)
+
+    def _match_rows(self, rows, taken_collection_ids=(), taken_invoice_ids=()):
+        """Match statement rows against open collections and invoices in one pass
+
+        Open collections and invoices are loaded once and hashed by
+        normalised reference and by amount; each row then only looks up its
+        own keys. Scores add up reference, amount and date agreement.
+
+        :param rows: list of line values with date, amount, reference and description
+        :param taken_collection_ids: collections already confirmed elsewhere
+        :param taken_invoice_ids: invoices already confirmed elsewhere
+        :return: list of line match values aligned with ``rows``
+        """
+        self.ensure_one()
+        if not rows:
+            return []
+        window = timedelta(days=self.date_window)
+        dates = [row['date'] for row in rows]
+        date_from, date_to = min(dates) - window, max(dates) + window
+
+        # Candidates are (model, id, reference keys, amount, date)
+        candidates = []
+        for collection in self.env['property.collection'].search([
+            ('status', 'in', ['draft', 'collected']),
+            ('payment_method', 'in', self._BANK_PAYMENT_METHODS),
+            ('date', '>=', date_from),
+            ('date', '<=', date_to),
+        ]):
+            keys = {self._normalize_reference(collection.reference_number),
+                    self._normalize_reference(collection.receipt_number)} - {''}
+            candidates.append(('property.collection', collection.id, keys,
+                               collection.amount_collected, collection.date))
+        for invoice in self.env['account.move'].search([
+            ('move_type', '=', 'out_invoice'),
+            ('state', '=', 'posted'),
+            ('payment_state', 'in', ['not_paid', 'partial']),
+            ('invoice_date', '>=', date_from - timedelta(days=self._INVOICE_LOOKBACK_DAYS)),
+            ('invoice_date', '<=', date_to),
+        ]):
+            keys = {self._normalize_reference(invoice.name),
+                    self._normalize_reference(invoice.payment_reference)} - {''}
+            candidates.append(('account.move', invoice.id, keys,
+                               invoice.amount_residual, invoice.invoice_date_due or invoice.invoice_date))
+
+        by_reference = defaultdict(list)
+        by_amount = defaultdict(list)
+        for candidate in candidates:
+            for key in candidate[2]:
+                by_reference[key].append(candidate)
+            by_amount[self._amount_key(candidate[3])].append(candidate)
+
+        taken = {('property.collection', collection_id) for collection_id in taken_collection_ids}
+        taken |= {('account.move', invoice_id) for invoice_id in taken_invoice_ids}
+        results = []
+        for row in rows:
+            text = f"{row.get('reference') or ''} {row.get('description') or ''}"
+            tokens = {self._normalize_reference(word) for word in text.split()}
+            tokens.add(self._normalize_reference(row.get('reference')))
+            tokens = {token for token in tokens if len(token) >= 3}
+
+            pool = {}
+            for token in tokens:
+                for candidate in by_reference.get(token, ()):
+                    pool[candidate[:2]] = candidate
+            for candidate in by_amount.get(self._amount_key(row['amount']), ()):
+                # Amount alone only counts for payments close in date
+                if candidate[4] and abs((row['date'] - candidate[4]).days) <= self.date_window:
+                    pool[candidate[:2]] = candidate
+
+            ranked = sorted(
+                ((self._match_score(row, tokens, candidate), candidate)
+                 for key, candidate in pool.items() if key not in taken),
+                key=lambda scored: scored[0], reverse=True,
+            )
+            results.append(self._match_result(ranked, taken))
+        return results
+
+    def _match_score(self, row, tokens, candidate):
+        __, ___, keys, amount, candidate_date = candidate
+        score = 0.0
+        if keys & tokens:
+            score += self._SCORE_REFERENCE
+        if float_compare(amount, row['amount'], precision_digits=2) == 0:
+            score += self._SCORE_AMOUNT
+        if candidate_date:
+            days = abs((row['date'] - candidate_date).days)
+            if days <= self.date_window:
+                score += self._SCORE_DATE * (1 - days / (self.date_window + 1))
+        return round(score, 4)
+
+    def _match_result(self, ranked, taken):
+        """Turn the ranked candidates of one row into line values, reserving the proposed candidate"""
+        if not ranked:
+            return {'match_state': 'unmatched', 'confidence': 0.0, 'collection_id': False,
+                    'invoice_id': False, 'candidate_collection_ids': [(5, 0, 0)],
+                    'candidate_invoice_ids': [(5, 0, 0)]}
+        best_score, best = ranked[0]
+        runner_up = ranked[1][0] if len(ranked) > 1 else 0.0
+        if best_score >= self.confidence_threshold and best_score - runner_up >= self._SCORE_MARGIN:
+            taken.add(best[:2])
+            return {
+                'match_state': 'proposed',
+                'confidence': best_score,
+                'collection_id': best[1] if best[0] == 'property.collection' else False,
+                'invoice_id': best[1] if best[0] == 'account.move' else False,
+                'candidate_collection_ids': [(5, 0, 0)],
+                'candidate_invoice_ids': [(5, 0, 0)],
+            }
+        shortlist = [candidate for __, candidate in ranked[:self._REVIEW_CANDIDATES]]
+        return {
+            'match_state': 'ambiguous',
+            'confidence': best_score,
+            'collection_id': False,
+            'invoice_id': False,
+            'candidate_collection_ids': [(6, 0, [c[1] for c in shortlist if c[0] == 'property.collection'])],
+            'candidate_invoice_ids': [(6, 0, [c[1] for c in shortlist if c[0] == 'account.move'])],
+        }
+
+
+class PropertyBankImportLine(models.Model):
+    _name = 'property.bank.import.line'
+    _description = 'Bank Statement Import Line'
+    _order = 'import_id, date, id'
+
+    import_id = fields.Many2one('property.bank.import', 'Statement Import', required=True, ondelete='cascade', index=True)
+    date = fields.Date('Date', required=True)
+    amount = fields.Float('Amount', digits=(16, 2))
+    reference = fields.Char('Reference')
+    description = fields.Char('Description')
+    counterparty = fields.Char('Counterparty')
+
+    match_state = fields.Selection([
+        ('proposed', 'Proposed'),
+        ('ambiguous', 'To Review'),
+        ('unmatched', 'Unmatched'),
+        ('confirmed', 'Confirmed'),
+    ], string='Match', default='unmatched', index=True)
+    confidence = fields.Float('Confidence', digits=(3, 2))
+    collection_id = fields.Many2one('property.collection', 'Collection')
+    invoice_id = fields.Many2one('account.move', 'Invoice')
+    candidate_collection_ids = fields.Many2many('property.collection', 'property_bank_import_line_collection_rel',
+                                                'line_id', 'collection_id', string='Candidate Collections')
+    candidate_invoice_ids = fields.Many2many('account.move', 'property_bank_import_line_invoice_rel',
+                                             'line_id', 'move_id', string='Candidate Invoices')
+
+    # Collection type recorded for a bank payment of each invoice type
+    _INVOICE_COLLECTION_TYPES = {
+        'rent': 'rent',
+        'deposit': 'deposit',
+        'parking': 'parking_charges',
+        'maintenance': 'maintenance',
+        'utility': 'utility',
+        'penalty': 'penalty',
+        'other': 'other_charges',
+    }
+
+    def action_confirm(self):
+        """Confirm the chosen matches
+
+        Matched collections are verified in one write. Lines matched to an
+        invoice only are recorded as verified bank collections in one bulk
+        posting, which registers and reconciles their payments; lines whose
+        collection could not be posted stay unconfirmed.
+        """
+        lines = self.filtered(lambda l: l.match_state != 'confirmed' and (l.collection_id or l.invoice_id))
+        collections = lines.collection_id.filtered(lambda c: c.status in ['draft', 'collected'])
+        if collections:
+            collections.action_verify()
+
+        invoice_lines = lines.filtered(lambda l: not l.collection_id)
+        if invoice_lines:
+            result = self.env['property.collection'].post_bulk([
+                line._prepare_collection_vals() for line in invoice_lines
+            ])
+            for index, (line, collection_id) in enumerate(zip(invoice_lines, result['collection_ids'])):
+                if collection_id:
+                    line.collection_id = collection_id
+                else:
+                    _logger.warning(f"Could not record a collection for statement line {line.reference or line.id}: "
+                                    f"{result['errors'].get(index)}")
+
+        lines.filtered('collection_id').write({'match_state': 'confirmed'})
+        return True
+
+    def _prepare_collection_vals(self):
+        """Values of the verified collection recording this line's payment of its invoice
+
+        The invoice is set as the collection's match so its payment is
+        reconciled against that invoice rather than one found by type.
+        """
+        self.ensure_one()
+        invoice = self.invoice_id
+        return {
+            'tenant_id': invoice.tenant_id.id,
+            'agreement_id': invoice.agreement_id.id,
+            'room_id': (invoice.room_id or invoice.agreement_id.room_id).id,
+            'date': self.date,
+            'collection_type': self._INVOICE_COLLECTION_TYPES.get(invoice.invoice_type, 'other'),
+            'amount_collected': self.amount,
+            'payment_method': 'bank_transfer',
+            'reference_number': self.reference or invoice.name,
+            'bank_id': self.import_id.bank_id.id,
+            'period_from': invoice.period_from,
+            'period_to': invoice.period_to,
+            'status': 'verified',
+            'verified_by': self.env.user.id,
+            'verification_date': fields.Datetime.now(),
+            'matched_invoice_ids': [(6, 0, invoice.ids)],
+        }
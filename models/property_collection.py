@@ -1,6 +1,9 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
 from datetime import timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
 
 
 class PropertyCollection(models.Model):
@@ -71,7 +74,10 @@ class PropertyCollection(models.Model):
     
     # Receipt Information
     receipt_number = fields.Char('Receipt Number')
-    receipt_image = fields.Binary('Receipt Image')
+    # Lists only ever read the thumbnail; the full image loads on demand
+    receipt_image = fields.Image('Receipt Image', max_width=1920, max_height=1920)
+    receipt_image_128 = fields.Image('Receipt Thumbnail', related='receipt_image',
+                                     max_width=128, max_height=128, store=True)
     receipt_filename = fields.Char('Receipt Filename')
     
     # Financial
@@ -102,20 +108,56 @@ class PropertyCollection(models.Model):
                                           string='Matched Invoices', readonly=True,
                                           help="Invoices paid by this collection")
     
-    @api.model
-    def create(self, vals):
-        # Generate receipt number for new collections
-        if not vals.get('receipt_number'):
-            sequence = self.env['ir.sequence'].next_by_code('property.collection') or '/'
-            vals['receipt_number'] = sequence
+    # Statuses a collection may be in to move to each status
+    _STATUS_TRANSITIONS = {
+        'collected': ['draft'],
+        'verified': ['draft', 'collected'],
+        'deposited': ['verified'],
+        'cancelled': ['draft', 'collected', 'verified'],
+    }
+    _STATUS_ACTIONS = {
+        'collected': 'action_collect',
+        'verified': 'action_verify',
+        'deposited': 'action_deposit',
+        'cancelled': 'action_cancel',
+    }
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        # Generate receipt numbers for new collections in one block
+        missing_receipts = [vals for vals in vals_list if not vals.get('receipt_number')]
+        for vals, receipt_number in zip(missing_receipts, self._allocate_receipt_numbers(len(missing_receipts))):
+            vals['receipt_number'] = receipt_number
+        
+        tenants = self.env['property.tenant'].browse(
+            {vals['tenant_id'] for vals in vals_list if vals.get('tenant_id') and not vals.get('room_id')}
+        )
+        tenants_by_id = {tenant.id: tenant for tenant in tenants}
         
+        for vals in vals_list:
+            self._prepare_create_vals(vals, tenants_by_id)
+        
+        collections = super().create(vals_list)
+        
+        # Only register payment for verified/deposited collections
+        collections.filtered(
+            lambda c: c.status in ['verified', 'deposited'] and not c.payment_id
+        )._register_payments_bulk()
+        
+        # Queue recomputation of outstanding dues
+        self.env['property.outstanding.dues'].queue_recompute(collections.mapped('tenant_id').ids)
+        
+        return collections
+    
+    def _prepare_create_vals(self, vals, tenants_by_id):
+        """Complete create values in place with defaults derived from the tenant and date"""
         # Set collected_by to current user if not set
         if not vals.get('collected_by'):
             vals['collected_by'] = self.env.user.id
         
         # Auto-populate room and agreement from tenant if not provided
         if vals.get('tenant_id') and not vals.get('room_id'):
-            tenant = self.env['property.tenant'].browse(vals['tenant_id'])
+            tenant = tenants_by_id[vals['tenant_id']]
             if tenant.current_room_id:
                 vals['room_id'] = tenant.current_room_id.id
             if tenant.current_agreement_id and not vals.get('agreement_id'):
@@ -135,11 +177,7 @@ class PropertyCollection(models.Model):
         if (vals.get('collection_type') in ['rent', 'parking_charges'] and vals.get('date') and 
             not vals.get('period_from') and not vals.get('period_to')):
             
-            from datetime import datetime
-            if isinstance(vals['date'], str):
-                collection_date = datetime.strptime(vals['date'], '%Y-%m-%d').date()
-            else:
-                collection_date = vals['date']
+            collection_date = fields.Date.to_date(vals['date'])
             
             year = collection_date.year
             month = collection_date.month
@@ -158,78 +196,107 @@ class PropertyCollection(models.Model):
             vals['period_to'] = period_to
             
             # Set due date to last day of previous month
-            if month == 1:
-                due_date = collection_date.replace(year=year - 1, month=12, day=31)
+            vals['due_date'] = period_from - timedelta(days=1)
+        return vals
+    
+    @api.model
+    def _allocate_receipt_numbers(self, count):
+        """Reserve ``count`` receipt numbers from the collection sequence at once"""
+        if not count:
+            return []
+        sequence_obj = self.env['ir.sequence']
+        sequence = sequence_obj.sudo().search([
+            ('code', '=', 'property.collection'),
+            ('company_id', 'in', [self.env.company.id, False]),
+        ], order='company_id', limit=1)
+        if not sequence or sequence.implementation != 'standard' or sequence.use_date_range:
+            # Gapless and date-range sequences are drawn one by one
+            return [sequence_obj.next_by_code('property.collection') or '/' for __ in range(count)]
+        
+        # Standard sequences are PostgreSQL sequences: draw the whole block in one query
+        self.env.cr.execute(
+            "SELECT nextval(%s) FROM generate_series(1, %s)",
+            [f'ir_sequence_{sequence.id:03d}', count],
+        )
+        return [sequence.get_next_char(row[0]) for row in self.env.cr.fetchall()]
+    
+    @api.model
+    def post_bulk(self, vals_list):
+        """Create a cash run of collections together, isolating bad rows
+
+        Rows are validated up front and the valid ones created in a single
+        batch, so receipt numbers, statement entries and dues recomputes are
+        handled as set operations. If the batch fails, its rows are retried
+        one by one in savepoints so a bad row does not roll back the others.
+
+        :param vals_list: list of collection create values
+        :return: dict with ``collection_ids`` aligned with ``vals_list`` (False
+                 for rejected rows) and ``errors`` as {row index: message}
+        """
+        tenant_ids = {vals['tenant_id'] for vals in vals_list if vals.get('tenant_id')}
+        known_tenant_ids = set(self.env['property.tenant'].browse(tenant_ids).exists().ids)
+        
+        errors = {}
+        valid_indexes = []
+        for index, vals in enumerate(vals_list):
+            error = self._check_bulk_vals(vals, known_tenant_ids)
+            if error:
+                errors[index] = error
             else:
-                next_month_first = collection_date.replace(day=1)
-                due_date = next_month_first - timedelta(days=1)
-            vals['due_date'] = due_date
-        
-        collection = super().create(vals)
+                valid_indexes.append(index)
         
-        # Only register payment for verified/deposited collections
-        if collection.status in ['verified', 'deposited'] and not collection.payment_id:
+        collection_ids = [False] * len(vals_list)
+        try:
+            with self.env.cr.savepoint():
+                collections = self.create([dict(vals_list[index]) for index in valid_indexes])
+            for index, collection in zip(valid_indexes, collections):
+                collection_ids[index] = collection.id
+        except Exception as e:
+            _logger.warning(f"Bulk collection batch failed ({str(e)}), posting rows one by one")
+            for index in valid_indexes:
+                try:
+                    with self.env.cr.savepoint():
+                        collection_ids[index] = self.create(dict(vals_list[index])).id
+                except Exception as row_error:
+                    errors[index] = str(row_error)
+        
+        _logger.info(f"Bulk collection posting: {len(vals_list) - len(errors)} posted, {len(errors)} rejected")
+        return {'collection_ids': collection_ids, 'errors': errors}
+    
+    def _check_bulk_vals(self, vals, known_tenant_ids):
+        """Return why a bulk posting row cannot be created, or None if it looks valid"""
+        if not vals.get('tenant_id'):
+            return _('Tenant is required.')
+        if vals['tenant_id'] not in known_tenant_ids:
+            return _('Tenant %s does not exist.', vals['tenant_id'])
+        if 'amount_collected' in vals and (vals['amount_collected'] or 0) <= 0:
+            return _('Collection amount must be positive!')
+        if not vals.get('amount_collected') and not vals.get('collection_type'):
+            return _('Amount or collection type is required.')
+        for field_name in ('payment_method', 'collection_type', 'status'):
+            if vals.get(field_name) and vals[field_name] not in self._fields[field_name].get_values(self.env):
+                return _('Invalid %(field)s: %(value)s', field=field_name, value=vals[field_name])
+        if vals.get('date'):
             try:
-                collection._register_payment_for_collection()
-            except Exception as e:
-                # Log error but don't block collection creation
-                import logging
-                _logger = logging.getLogger(__name__)
-                _logger.warning(f"Could not register payment for collection {collection.name}: {str(e)}")
-        
-        # Trigger recomputation of outstanding dues
-        if collection.tenant_id:
-            self.env['property.outstanding.dues'].recompute_for_tenant(collection.tenant_id.id)
-        
-        return collection
+                fields.Date.to_date(vals['date'])
+            except ValueError:
+                return _('Invalid date: %s', vals['date'])
+        return None
     
     def write(self, vals):
         """Override write to invalidate related computed fields when active status changes"""
         
-        # Handle cancellation - remove statement entry and reverse payment
+        # Handle cancellation - remove statement entries and reverse payments
         if 'status' in vals and vals['status'] == 'cancelled':
-            for record in self:
-                # Delete statement entry if exists
-                if record.statement_id:
-                    record.statement_id.unlink()
-                
-                # Cancel payment if exists
-                if record.payment_id:
-                    try:
-                        # Set to draft first, then delete to avoid validation errors
-                        if record.payment_id.state == 'posted':
-                            record.payment_id.button_draft()
-                        record.payment_id.unlink()
-                    except Exception as e:
-                        import logging
-                        _logger = logging.getLogger(__name__)
-                        _logger.warning(f"Could not cancel payment for collection {record.name}: {str(e)}")
+            self._cancel_accounting()
         
         # Handle verification - create statement and register payment
         if 'status' in vals and vals['status'] in ['collected', 'verified', 'deposited']:
-            for record in self:
-                # Create statement entry if doesn't exist
-                if record.tenant_id and not record.statement_id:
-                    try:
-                        # Use savepoint to isolate constraint violations
-                        with self.env.cr.savepoint():
-                            statement = self.env['property.statement'].create_from_collection(record)
-                            record.statement_id = statement.id
-                    except Exception as e:
-                        # Skip duplicates silently
-                        import logging
-                        _logger = logging.getLogger(__name__)
-                        _logger.warning(f"Could not create statement for collection {record.name}: {str(e)}")
-                
-                # Register payment if doesn't exist
-                if not record.payment_id:
-                    try:
-                        record._register_payment_for_collection()
-                    except Exception as e:
-                        # Log error but don't block collection creation
-                        import logging
-                        _logger = logging.getLogger(__name__)
-                        _logger.warning(f"Could not register payment for collection {record.name}: {str(e)}")
+            # Create missing statement entries in one batch; duplicates are skipped by the database
+            self.filtered(lambda r: r.tenant_id and not r.statement_id)._create_statements_bulk()
+            
+            # Register payments that don't exist yet as one accounting batch
+            self.filtered(lambda r: not r.payment_id)._register_payments_bulk()
         
         result = super(PropertyCollection, self).write(vals)
         
@@ -250,13 +317,9 @@ class PropertyCollection(models.Model):
             if rooms_to_recompute:
                 rooms_to_recompute._compute_payment_stats()
         
-        return result
-        
-        # Trigger recomputation of outstanding dues if relevant fields changed
+        # Queue recomputation of outstanding dues if relevant fields changed
         if 'status' in vals or 'amount_collected' in vals or 'collection_type' in vals:
-            for record in self:
-                if record.tenant_id:
-                    self.env['property.outstanding.dues'].recompute_for_tenant(record.tenant_id.id)
+            self.env['property.outstanding.dues'].queue_recompute(self.mapped('tenant_id').ids)
         
         return result
 
@@ -441,24 +504,86 @@ class PropertyCollection(models.Model):
                 raise ValidationError(_('Collection amount must be positive!'))
     
     def action_collect(self):
-        self.write({'status': 'collected'})
-        # Generate receipt number
-        if not self.receipt_number:
-            sequence = self.env['ir.sequence'].next_by_code('property.collection') or '/'
-            self.receipt_number = sequence
+        collections, __ = self._bulk_transition('collected')
+        # Generate receipt numbers as one block
+        missing = collections.filtered(lambda c: not c.receipt_number)
+        for collection, number in zip(missing, self._allocate_receipt_numbers(len(missing))):
+            collection.receipt_number = number
     
     def action_verify(self):
-        self.write({
-            'status': 'verified',
+        self._bulk_transition('verified', {
             'verified_by': self.env.user.id,
             'verification_date': fields.Datetime.now(),
         })
     
     def action_deposit(self):
-        self.write({'status': 'deposited'})
+        self._bulk_transition('deposited')
     
     def action_cancel(self):
-        self.write({'status': 'cancelled'})
+        self._bulk_transition('cancelled')
+    
+    def action_bulk_transition(self, status):
+        """Move the selected collections to ``status`` and report how many moved"""
+        moved = self.filtered(lambda c: c.status in self._STATUS_TRANSITIONS[status])
+        getattr(moved, self._STATUS_ACTIONS[status])()
+        skipped = len(self) - len(moved)
+        label = dict(self._fields['status'].selection)[status]
+        message = _('%(count)s collections marked as %(status)s.', count=len(moved), status=label)
+        if skipped:
+            message += ' ' + _('%s skipped because their status does not allow it.', skipped)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'message': message,
+                'type': 'warning' if skipped else 'success',
+                'next': {'type': 'ir.actions.act_window_close'},
+            },
+        }
+    
+    def _bulk_transition(self, status, extra_vals=None):
+        """Move every collection allowed to reach ``status`` there in one write
+        
+        Statements, payments and the outstanding dues recompute of the whole
+        selection are then handled as batches by :meth:`write`.
+        
+        :return: (moved, skipped) collections
+        """
+        moved = self.filtered(lambda c: c.status in self._STATUS_TRANSITIONS[status])
+        if moved:
+            moved.write(dict(extra_vals or {}, status=status))
+        return moved, self - moved
+    
+    def _cancel_accounting(self):
+        """Delete the statement entries and payments of collections being cancelled
+        
+        Statements go in one unlink, so running balances are recomputed once
+        per tenant. Payments are reset and deleted together; if the batch
+        fails they are retried one by one so a single locked payment does
+        not block the others.
+        """
+        self.statement_id.unlink()
+        
+        payments = self.payment_id
+        if not payments:
+            return
+        try:
+            with self.env.cr.savepoint():
+                payments.filtered(lambda p: p.state == 'posted').action_draft()
+                payments.unlink()
+            return
+        except Exception as e:
+            _logger.warning(f"Could not cancel {len(payments)} payments together, retrying one by one: {e}")
+        
+        for record in self.filtered('payment_id'):
+            try:
+                with self.env.cr.savepoint():
+                    # Set to draft first, then delete to avoid validation errors
+                    if record.payment_id.state == 'posted':
+                        record.payment_id.action_draft()
+                    record.payment_id.unlink()
+            except Exception as e:
+                _logger.warning(f"Could not cancel payment for collection {record.name}: {str(e)}")
     
     def action_print_receipt(self):
         # Simple receipt printing - can be enhanced with proper report
@@ -522,12 +647,12 @@ class PropertyCollection(models.Model):
         'other': 'other',
     }
     
-    def _register_payment_for_collection(self):
+    def _register_payment_for_collection(self, invoice_index=None):
         """Register payment against matching invoices when collection is recorded"""
         self.ensure_one()
         
         # Find matching unpaid invoices
-        invoices = self._find_matching_invoices()
+        invoices = self._find_matching_invoices(invoice_index)
         
         if not invoices:
             # No invoices to pay - this is OK, invoice might be generated later
@@ -554,70 +679,202 @@ class PropertyCollection(models.Model):
             # Reconcile payment with invoices
             self._reconcile_payment_with_invoices(payment, invoices)
     
-    def _find_matching_invoices(self):
-        """Find unpaid invoices that match this collection"""
-        self.ensure_one()
-        
-        import logging
-        _logger = logging.getLogger(__name__)
+    def _register_payments_bulk(self):
+        """Register the payments of these collections as one accounting batch
+
+        Invoices are matched from a shared open-invoice index, consuming
+        residuals as collections claim them. Payments are created with one
+        create(), posted together and reconciled per partner against receivable
+        lines selected in a single query. If the batch fails, collections fall
+        back to one-by-one registration so a bad one does not block the rest.
+        """
+        if not self:
+            return
+        invoice_index = self._build_open_invoice_index()
+        remaining = {
+            invoice.id: invoice.amount_residual
+            for invoices in invoice_index.values() for invoice in invoices
+        }
         
-        # Map collection type to invoice type
-        invoice_type = self.COLLECTION_TO_INVOICE_TYPE.get(self.collection_type)
+        matches = []
+        for collection in self:
+            if not collection.tenant_id.partner_id:
+                continue
+            invoices = collection._find_matching_invoices(invoice_index)
+            if not invoices:
+                _logger.debug("No matching invoices found for collection %s", collection.name)
+                continue
+            journal = collection._get_payment_journal()
+            if not journal:
+                _logger.warning(f"No suitable journal found for payment method {collection.payment_method}")
+                continue
+            matches.append((collection, invoices, journal))
+            
+            # Invoices this collection settles are no longer open for the next ones
+            amount = collection.amount_collected
+            for invoice in invoices:
+                # Explicitly matched invoices may be outside the tenant's index
+                remaining.setdefault(invoice.id, invoice.amount_residual)
+                taken = min(amount, remaining[invoice.id])
+                remaining[invoice.id] -= taken
+                amount -= taken
+                tenant_invoices = invoice_index.get(collection.tenant_id.id, [])
+                if remaining[invoice.id] <= 0 and invoice in tenant_invoices:
+                    tenant_invoices.remove(invoice)
+                if amount <= 0:
+                    break
+        if not matches:
+            return
         
-        if not invoice_type:
-            _logger.info(f"Collection {self.name}: No invoice type mapping for collection_type='{self.collection_type}'")
-            return self.env['account.move']
+        # Group by journal and partner so each journal's payments are numbered together
+        matches.sort(key=lambda match: (match[2].id, match[0].tenant_id.partner_id.id))
+        try:
+            with self.env.cr.savepoint():
+                payments = self.env['account.payment'].create([
+                    collection._prepare_payment_vals(journal) for collection, __, journal in matches
+                ])
+                payments.filtered(lambda p: p.state == 'draft').action_post()
+                for (collection, invoices, __), payment in zip(matches, payments):
+                    collection.write({
+                        'payment_id': payment.id,
+                        'matched_invoice_ids': [(6, 0, invoices.ids)],
+                        'payment_reference': payment.name,
+                    })
+        except Exception as e:
+            _logger.warning(f"Batch payment registration failed ({str(e)}), registering one by one")
+            for collection, __, ___ in matches:
+                try:
+                    with self.env.cr.savepoint():
+                        collection._register_payment_for_collection()
+                except Exception as row_error:
+                    _logger.warning(f"Could not register payment for collection {collection.name}: {str(row_error)}")
+            return
         
-        # Build search domain - start with basic criteria
-        domain = [
-            ('tenant_id', '=', self.tenant_id.id),
+        self._reconcile_payments_bulk([
+            (collection.tenant_id.partner_id, payment, invoices)
+            for (collection, invoices, __), payment in zip(matches, payments)
+        ])
+    
+    @api.model
+    def _reconcile_payments_bulk(self, groups):
+        """Reconcile each payment with its own collection's invoices
+
+        Receivable lines of the whole batch are selected in one query; each
+        payment is then reconciled only against the invoices its collection
+        matched, so matched_invoice_ids reflects what was actually settled.
+
+        :param groups: list of (partner, payment, invoices)
+        """
+        moves = self.env['account.move'].union(*[payment.move_id for __, payment, ___ in groups])
+        moves |= self.env['account.move'].union(*[invoices for __, ___, invoices in groups])
+        
+        # All open receivable lines of the batch in one query
+        open_lines = self.env['account.move.line'].search([
+            ('move_id', 'in', moves.ids),
+            ('account_id.account_type', '=', 'asset_receivable'),
+            ('reconciled', '=', False),
+        ])
+        lines_by_move = {}
+        for line in open_lines:
+            lines_by_move.setdefault(line.move_id.id, self.env['account.move.line'])
+            lines_by_move[line.move_id.id] |= line
+        
+        for partner, payment, invoices in groups:
+            receivable_account = partner.property_account_receivable_id
+            if not receivable_account:
+                _logger.warning(f"No receivable account found for partner {partner.name}")
+                continue
+            payment_lines = lines_by_move.get(payment.move_id.id, self.env['account.move.line']).filtered(
+                lambda line: line.account_id == receivable_account and line.credit > 0
+            )
+            # Invoices shared with an earlier collection of the batch may be settled already
+            invoice_lines = self.env['account.move.line'].union(*[
+                lines_by_move.get(invoice.id, self.env['account.move.line']) for invoice in invoices
+            ]).filtered(lambda line: line.account_id == receivable_account and line.debit > 0 and not line.reconciled)
+            if not payment_lines or not invoice_lines:
+                _logger.warning(f"Could not find unreconciled lines for payment {payment.name} and invoices {invoices.mapped('name')}")
+                continue
+            try:
+                with self.env.cr.savepoint():
+                    (payment_lines | invoice_lines).reconcile()
+            except Exception as e:
+                _logger.error(f"Failed to reconcile payment {payment.name}: {str(e)}")
+    
+    def _build_open_invoice_index(self):
+        """Load the open posted invoices of these collections' tenants in one query
+
+        :return: {tenant_id: invoices ordered by invoice date}, to pass to
+                 _find_matching_invoices for every collection of the batch
+        """
+        invoices = self.env['account.move'].search([
+            ('tenant_id', 'in', self.tenant_id.ids),
             ('move_type', '=', 'out_invoice'),
             ('state', '=', 'posted'),
             ('payment_state', 'in', ['not_paid', 'partial']),
-        ]
+        ], order='invoice_date asc, id asc')
+        index = {}
+        for invoice in invoices:
+            index.setdefault(invoice.tenant_id.id, []).append(invoice)
+        return index
+    
+    def _find_matching_invoices(self, invoice_index=None):
+        """Find unpaid invoices that match this collection
+
+        Invoices set on the collection before registration (e.g. by a bank
+        statement match) are used as they are while still open. Otherwise
+        tries, in order: same type and agreement with an overlapping period
+        (rent/parking only), same type and agreement, then any open invoice
+        of the tenant. Candidates come from ``invoice_index`` when given.
+        """
+        self.ensure_one()
+        Move = self.env['account.move']
         
-        _logger.info(f"Collection {self.name}: Searching for invoices with tenant={self.tenant_id.name}, type=out_invoice, state=posted")
+        if self.matched_invoice_ids and not self.payment_id:
+            return self.matched_invoice_ids.filtered(lambda i: i.payment_state in ['not_paid', 'partial'])
         
-        # Try with invoice_type first
-        domain_with_type = domain + [('invoice_type', '=', invoice_type)]
+        # Map collection type to invoice type
+        invoice_type = self.COLLECTION_TO_INVOICE_TYPE.get(self.collection_type)
         
-        # Add agreement filter if available
-        if self.agreement_id:
-            domain_with_type.append(('agreement_id', '=', self.agreement_id.id))
-            _logger.info(f"  - With agreement={self.agreement_id.name}")
+        if not invoice_type:
+            _logger.debug("Collection %s: no invoice type mapping for collection_type=%s", self.name, self.collection_type)
+            return Move
+        
+        if invoice_index is None:
+            invoice_index = self._build_open_invoice_index()
+        # Invoices paid earlier in the same batch drop out here
+        candidates = [
+            invoice for invoice in invoice_index.get(self.tenant_id.id, [])
+            if invoice.payment_state in ['not_paid', 'partial']
+        ]
         
-        # Add period filter for rent/parking (optional - try with and without)
+        typed = [
+            invoice for invoice in candidates
+            if invoice.invoice_type == invoice_type
+            and (not self.agreement_id or invoice.agreement_id == self.agreement_id)
+        ]
+        
+        # Period overlap for rent/parking
         if self.collection_type in ['rent', 'parking_charges'] and self.period_from and self.period_to:
-            domain_with_period = domain_with_type + [
-                ('period_from', '<=', self.period_to),
-                ('period_to', '>=', self.period_from),
+            with_period = [
+                invoice for invoice in typed
+                if invoice.period_from and invoice.period_to
+                and invoice.period_from <= self.period_to and invoice.period_to >= self.period_from
             ]
-            _logger.info(f"  - With period overlap: {self.period_from} to {self.period_to}")
-            invoices = self.env['account.move'].search(domain_with_period, order='invoice_date asc', limit=10)
-            
-            if invoices:
-                _logger.info(f"  ✓ Found {len(invoices)} invoice(s) with period matching")
-                return invoices
-            else:
-                _logger.info(f"  - No invoices found with period matching, trying without period filter...")
-        
-        # Try without period filter
-        invoices = self.env['account.move'].search(domain_with_type, order='invoice_date asc', limit=10)
+            if with_period:
+                _logger.debug("Collection %s: %s invoice(s) match type and period", self.name, len(with_period[:10]))
+                return Move.union(*with_period[:10])
         
-        if invoices:
-            _logger.info(f"  ✓ Found {len(invoices)} invoice(s) with invoice_type={invoice_type}")
-            return invoices
+        if typed:
+            _logger.debug("Collection %s: %s invoice(s) match invoice_type=%s", self.name, len(typed[:10]), invoice_type)
+            return Move.union(*typed[:10])
         
-        # Try without invoice_type (more lenient)
-        _logger.info(f"  - No invoices found with invoice_type={invoice_type}, trying without invoice_type...")
-        invoices = self.env['account.move'].search(domain, order='invoice_date asc', limit=10)
+        # More lenient: any open invoice of the tenant
+        if candidates:
+            _logger.debug("Collection %s: %s invoice(s) without invoice_type filter", self.name, len(candidates[:10]))
+            return Move.union(*candidates[:10])
         
-        if invoices:
-            _logger.info(f"  ✓ Found {len(invoices)} invoice(s) without invoice_type filter")
-            return invoices
-        
-        _logger.info(f"  ✗ No matching invoices found for collection {self.name}")
-        return self.env['account.move']
+        _logger.debug("Collection %s: no matching invoices", self.name)
+        return Move
     
     def _create_payment_from_collection(self, invoices):
         """Create account.payment record from collection"""
@@ -636,6 +893,17 @@ class PropertyCollection(models.Model):
             return False
         
         # Create payment
+        payment = self.env['account.payment'].create(self._prepare_payment_vals(journal))
+        
+        # Link payment to invoices via reconciliation
+        # This happens automatically when payment is posted via action_post()
+        # Odoo matches partner_id and reconciles outstanding receivables
+        
+        return payment
+    
+    def _prepare_payment_vals(self, journal):
+        """Build the account.payment values of this collection"""
+        self.ensure_one()
         payment_vals = {
             'payment_type': 'inbound',
             'partner_type': 'customer',
@@ -648,15 +916,7 @@ class PropertyCollection(models.Model):
         
         # Add tenant_id if the field exists (from our custom extension)
         payment_vals['tenant_id'] = self.tenant_id.id
-        
-        # Create payment
-        payment = self.env['account.payment'].create(payment_vals)
-        
-        # Link payment to invoices via reconciliation
-        # This happens automatically when payment is posted via action_post()
-        # Odoo matches partner_id and reconciles outstanding receivables
-        
-        return payment
+        return payment_vals
     
     def _reconcile_payment_with_invoices(self, payment, invoices):
         """Reconcile payment with invoices by matching receivable account lines"""
@@ -701,31 +961,6 @@ class PropertyCollection(models.Model):
     def _get_payment_journal(self):
         """Get appropriate journal based on payment method"""
         self.ensure_one()
-        
-        # Map payment method to journal type
-        if self.payment_method in ['cash']:
-            journal_type = 'cash'
-        elif self.payment_method in ['bank_transfer', 'cheque', 'online', 'card']:
-            journal_type = 'bank'
-        elif self.payment_method == 'deposit_adjustment':
-            # Try to find a journal specifically for Deposit Adjustments
-            journal = self.env['account.journal'].search([
-                ('type', 'in', ['cash', 'bank', 'general']), # Accept general if possible, but payment needs cash/bank usually
-                ('name', 'ilike', 'Deposit'),
-                ('company_id', '=', self.env.company.id),
-            ], limit=1)
-            if journal:
-                return journal
-            journal_type = 'cash' # Fallback
-        else:
-            journal_type = 'cash'  # default
-        
-        # Find suitable journal
-        journal = self.env['account.journal'].search([
-            ('type', '=', journal_type),
-            ('company_id', '=', self.env.company.id),
-        ], limit=1)
-        
-        return journal
+        return self.env['property.payment.journal.map']._get_journal(self.env.company, self.payment_method)
     
     # ========== END INVOICE PAYMENT INTEGRATION ==========
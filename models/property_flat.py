@@ -157,6 +157,12 @@ class PropertyFlat(models.Model):
             'context': {'default_flat_id': self.id, 'default_property_id': self.property_id.id}
         }
     
+    def action_refresh_outstanding_dues(self):
+        """Recompute outstanding dues for this flat's tenants only"""
+        dues_obj = self.env['property.outstanding.dues']
+        stats = dues_obj.refresh_scope('property.flat', [('id', 'in', self.ids)])
+        return dues_obj._refresh_scope_notification(stats)
+    
     def action_add_room(self):
         return {
             'name': _('Add Room'),
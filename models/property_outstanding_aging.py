@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, tools
+
+
+class PropertyOutstandingAging(models.Model):
+    """Unpaid customer invoices bucketed by how long they are past due.
+
+    Backed by a plain database view evaluated against CURRENT_DATE, so the
+    buckets are always current and need no refresh job.
+    """
+    _name = 'property.outstanding.aging'
+    _description = 'Outstanding Invoice Aging'
+    _auto = False
+    _order = 'days_overdue desc, id'
+    _rec_name = 'move_id'
+
+    move_id = fields.Many2one('account.move', string='Invoice', readonly=True)
+    tenant_id = fields.Many2one('property.tenant', string='Tenant', readonly=True)
+    agreement_id = fields.Many2one('property.agreement', string='Agreement', readonly=True)
+    property_id = fields.Many2one('property.property', string='Property', readonly=True)
+    room_id = fields.Many2one('property.room', string='Room', readonly=True)
+    invoice_type = fields.Selection(
+        lambda self: self.env['account.move']._fields['invoice_type'].selection,
+        string='Invoice Type', readonly=True)
+    invoice_date = fields.Date(string='Invoice Date', readonly=True)
+    invoice_date_due = fields.Date(string='Due Date', readonly=True)
+    days_overdue = fields.Integer(string='Days Overdue', readonly=True)
+    aging_bucket = fields.Selection(
+        lambda self: self.env['property.outstanding.dues']._fields['status'].selection,
+        string='Aging Bucket', readonly=True)
+    currency_id = fields.Many2one('res.currency', string='Currency', readonly=True)
+
+    amount_residual = fields.Monetary('Outstanding', currency_field='currency_id', readonly=True)
+    amount_current = fields.Monetary('Not Yet Due', currency_field='currency_id', readonly=True)
+    amount_overdue_30 = fields.Monetary('1-30 Days', currency_field='currency_id', readonly=True)
+    amount_overdue_60 = fields.Monetary('31-60 Days', currency_field='currency_id', readonly=True)
+    amount_overdue_90 = fields.Monetary('61-90 Days', currency_field='currency_id', readonly=True)
+    amount_overdue_90plus = fields.Monetary('91-180 Days', currency_field='currency_id', readonly=True)
+    amount_critical = fields.Monetary('180+ Days', currency_field='currency_id', readonly=True)
+
+    # Upper bound in days of each bucket, in order; anything beyond is critical
+    _AGING_BUCKETS = [
+        ('current', 0),
+        ('overdue_30', 30),
+        ('overdue_60', 60),
+        ('overdue_90', 90),
+        ('overdue_90plus', 180),
+    ]
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        days = "GREATEST(CURRENT_DATE - COALESCE(m.invoice_date_due, m.invoice_date, CURRENT_DATE), 0)"
+        bucket_cases = "\n".join(
+            f"WHEN {days} <= {limit} THEN '{bucket}'" for bucket, limit in self._AGING_BUCKETS
+        )
+        amount_columns = []
+        lower = None
+        for bucket, limit in self._AGING_BUCKETS + [('critical', None)]:
+            conditions = []
+            if lower is not None:
+                conditions.append(f"{days} > {lower}")
+            if limit is not None:
+                conditions.append(f"{days} <= {limit}")
+            amount_columns.append(
+                f"CASE WHEN {' AND '.join(conditions)} THEN m.amount_residual ELSE 0 END AS amount_{bucket}"
+            )
+            lower = limit
+        self.env.cr.execute(f"""
+            CREATE OR REPLACE VIEW {self._table} AS (
+                SELECT m.id AS id,
+                       m.id AS move_id,
+                       m.tenant_id,
+                       m.agreement_id,
+                       a.property_id,
+                       a.room_id,
+                       m.invoice_type,
+                       m.invoice_date,
+                       m.invoice_date_due,
+                       {days} AS days_overdue,
+                       CASE {bucket_cases} ELSE 'critical' END AS aging_bucket,
+                       m.currency_id,
+                       m.amount_residual,
+                       {', '.join(amount_columns)}
+                  FROM account_move m
+             LEFT JOIN property_agreement a ON a.id = m.agreement_id
+                 WHERE m.move_type = 'out_invoice'
+                   AND m.state = 'posted'
+                   AND m.payment_state IN ('not_paid', 'partial')
+                   AND m.tenant_id IS NOT NULL
+                   AND (a.id IS NULL OR a.active)
+            )
+        """)
+
+    @api.model
+    def _bucket_for_days(self, days):
+        """Return the aging bucket of an amount ``days`` past due"""
+        for bucket, limit in self._AGING_BUCKETS:
+            if days <= limit:
+                return bucket
+        return 'critical'
+
+    @api.model
+    def get_aging_summary(self, groupby='tenant_id', domain=None):
+        """Total outstanding per bucket, grouped by tenant, agreement or property
+
+        :return: list of dicts with the group record and one amount per bucket
+        """
+        bucket_fields = [f'amount_{bucket}' for bucket, __ in self._AGING_BUCKETS] + ['amount_critical']
+        groups = self._read_group(
+            domain or [],
+            [groupby],
+            ['amount_residual:sum'] + [f'{field_name}:sum' for field_name in bucket_fields],
+        )
+        summary = []
+        for group, total, *amounts in groups:
+            row = {groupby: group, 'amount_residual': total}
+            row.update(zip(bucket_fields, amounts))
+            summary.append(row)
+        return summary
@@ -1,6 +1,13 @@
 from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from odoo.tools import float_compare, split_every
+from collections import defaultdict
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
+import logging
+import time
+
+_logger = logging.getLogger(__name__)
 
 
 class PropertyOutstandingDues(models.Model):
@@ -23,7 +30,7 @@ class PropertyOutstandingDues(models.Model):
                                        compute='_compute_total_outstanding', store=True)
     
     # Period Information
-    last_payment_date = fields.Date('Last Payment Date')
+    last_payment_date = fields.Date('Last Payment Date', index=True)
     months_overdue = fields.Integer('Months Overdue', compute='_compute_overdue_months')
     days_overdue = fields.Integer('Days Overdue', compute='_compute_overdue_days')
     
@@ -112,13 +119,43 @@ class PropertyOutstandingDues(models.Model):
             else:
                 record.expected_monthly_amount = 0
     
+    # Stored values compared when diffing a refresh against existing rows
+    _DUES_MANY2ONE_FIELDS = ('tenant_id', 'room_id', 'agreement_id')
+    _DUES_AMOUNT_FIELDS = ('rent_outstanding', 'deposit_outstanding',
+                           'parking_outstanding', 'other_charges_outstanding')
+    _DUES_BATCH_SIZE = 500
+
+    # Day counts at which the aging status changes, matching _compute_status
+    _STATUS_THRESHOLDS = (30, 60, 90, 180)
+    _ROLLOVER_PARAM = 'property_management_lite.dues_rollover_date'
+
+    # Scope model -> agreement field pointing at its records, for scoped refreshes
+    _REFRESH_SCOPES = {
+        'property.property': 'property_id',
+        'property.flat': 'room_id.flat_id',
+        'property.agreement': 'id',
+        'property.tenant': 'tenant_id',
+    }
+
+    # Pre-commit data key holding the tenant ids waiting for a recompute
+    _DUES_QUEUE_KEY = 'property.outstanding.dues.queue'
+
+    # invoice_type values summed into each outstanding amount
+    _DUES_CATEGORY_TYPES = {
+        'rent_outstanding': ('rent',),
+        'deposit_outstanding': ('deposit',),
+        'parking_outstanding': ('parking', 'parking_charges'),
+        'other_charges_outstanding': ('maintenance', 'utility', 'penalty', 'other'),
+    }
+
     @api.model
     def update_outstanding_dues(self):
-        """Method to calculate and update outstanding dues for all active tenants"""
-        
-        # Clear existing records
-        self.search([]).unlink()
-        
+        """Method to calculate and update outstanding dues for all active tenants
+
+        New values are computed first and diffed against the existing rows, so
+        only new, changed and stale rows are written and the table is never
+        empty while the refresh runs.
+        """
         # Get all active tenants with current agreements
         tenants = self.env['property.tenant'].search([
             ('active', '=', True),  # Filter archived tenants
@@ -126,133 +163,255 @@ class PropertyOutstandingDues(models.Model):
             ('current_room_id', '!=', False),
             ('current_agreement_id', '!=', False)
         ])
-        
-        for tenant in tenants:
-            self._create_for_tenant(tenant)
+
+        vals_by_tenant = self._prepare_dues_vals(tenants)
+        stats = self._apply_dues_diff(vals_by_tenant, self.search([]))
+        _logger.info(f"Outstanding dues refreshed: {stats}")
+        return stats
 
     @api.model
     def recompute_for_tenant(self, tenant_id):
         """Recompute outstanding dues for a specific tenant"""
         if not tenant_id:
             return
-            
-        tenant = self.env['property.tenant'].browse(tenant_id)
-        if not tenant.exists():
-            return
-            
-        # Delete existing record for this tenant
-        existing = self.search([('tenant_id', '=', tenant.id)])
-        existing.unlink()
-        
+        self.recompute_for_tenants([tenant_id])
+
+    @api.model
+    def recompute_for_tenants(self, tenant_ids):
+        """Recompute outstanding dues for several tenants in one batch
+
+        :return: dict with created, updated, deleted and unchanged counts
+        """
+        tenants = self.env['property.tenant'].browse(tenant_ids).exists()
         # Create new record if eligible
-        if tenant.active and tenant.status == 'active' and tenant.current_agreement_id:
-            self._create_for_tenant(tenant)
+        eligible = tenants.filtered(
+            lambda t: t.active and t.status == 'active' and t.current_agreement_id
+        )
+        vals_by_tenant = self._prepare_dues_vals(eligible)
+        return self._apply_dues_diff(vals_by_tenant, self.search([('tenant_id', 'in', tenants.ids)]))
 
-    def _create_for_tenant(self, tenant):
-        """Calculate and create outstanding dues record for a single tenant"""
-        agreement = tenant.current_agreement_id
-        if not agreement or agreement.state != 'active' or not agreement.active:
+    @api.model
+    def refresh_scope(self, model_name, domain):
+        """Recompute outstanding dues for one slice of the portfolio
+
+        Covers tenants with an active agreement in the slice plus tenants whose
+        existing dues rows point into it, so moved-out tenants are cleared too.
+
+        :param model_name: one of property.property, property.flat,
+            property.agreement or property.tenant
+        :param domain: domain on ``model_name`` selecting the slice
+        :return: dict with tenants, created, updated, deleted, unchanged and
+            seconds
+        """
+        start = time.perf_counter()
+        agreement_field = self._REFRESH_SCOPES.get(model_name)
+        if not agreement_field:
+            raise UserError(_("Outstanding dues cannot be refreshed by %s.", model_name))
+
+        records = self.env[model_name].search(domain)
+        agreements = self.env['property.agreement'].search([
+            (agreement_field, 'in', records.ids),
+            ('state', '=', 'active'),
+        ])
+        tenant_ids = set(agreements.tenant_id.ids)
+        tenant_ids |= set(self.search([(f'agreement_id.{agreement_field}', 'in', records.ids)]).tenant_id.ids)
+        if model_name == 'property.tenant':
+            tenant_ids |= set(records.ids)
+
+        stats = self.recompute_for_tenants(list(tenant_ids))
+        stats.update(tenants=len(tenant_ids), seconds=round(time.perf_counter() - start, 3))
+        _logger.info(f"Outstanding dues refreshed for {model_name} {records.ids}: {stats}")
+        return stats
+
+    @api.model
+    def _refresh_scope_notification(self, stats):
+        """Client notification summarising a scoped refresh"""
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Outstanding Dues Refreshed'),
+                'message': _(
+                    '%(tenants)s tenants in %(seconds)s s: %(created)s created, '
+                    '%(updated)s updated, %(deleted)s removed, %(unchanged)s unchanged.',
+                    **stats,
+                ),
+                'type': 'success',
+            }
+        }
+
+    @api.model
+    def queue_recompute(self, tenant_ids):
+        """Mark tenants for a dues recompute when the transaction commits
+
+        Tenants queued several times in one transaction are recomputed once.
+        Call flush_recompute_queue() when the result is needed right away.
+        """
+        tenant_ids = {tenant_id for tenant_id in tenant_ids if tenant_id}
+        if not tenant_ids:
             return
-        
-        # Calculate outstanding amounts
-        rent_outstanding = self._calculate_rent_outstanding(tenant, agreement)
-        deposit_outstanding = self._calculate_deposit_outstanding(tenant, agreement)
-        parking_outstanding = self._calculate_parking_outstanding(tenant, agreement)
-        other_charges_outstanding = self._calculate_other_charges_outstanding(tenant, agreement)
-        
-        # Get last payment date
-        last_collection = self.env['property.collection'].search([
-            ('tenant_id', '=', tenant.id),
-            ('active', '=', True),
-            ('agreement_id.active', '=', True)  # Exclude archived agreements
-        ], limit=1, order='date desc')
-        
-        last_payment_date = last_collection.date if last_collection else agreement.start_date
-        
-        # Create outstanding dues record only if there are outstanding amounts
-        if any([rent_outstanding, deposit_outstanding, parking_outstanding, other_charges_outstanding]):
-            self.create({
+        queue = self.env.cr.precommit.data.setdefault(self._DUES_QUEUE_KEY, set())
+        if not queue:
+            self.env.cr.precommit.add(self.flush_recompute_queue)
+        queue.update(tenant_ids)
+
+    @api.model
+    def flush_recompute_queue(self):
+        """Recompute the queued tenants now
+
+        :return: number of tenants recomputed
+        """
+        queue = self.env.cr.precommit.data.pop(self._DUES_QUEUE_KEY, None)
+        if not queue:
+            return 0
+        self.recompute_for_tenants(list(queue))
+        # May run as a pre-commit hook, after the regular flush: flush the
+        # dues and every stored compute depending on them (tenant totals, status)
+        self.env.flush_all()
+        return len(queue)
+
+    def _prepare_dues_vals(self, tenants):
+        """Calculate outstanding dues values for a set of tenants
+
+        Residuals and last payment dates come from one grouped query each,
+        whatever the number of tenants.
+
+        :return: {tenant_id: create values} for tenants that owe something
+        """
+        residuals = self._get_residuals_by_category(tenants.ids)
+        last_payment_dates = self._get_last_payment_dates(tenants.ids)
+
+        vals_by_tenant = {}
+        for tenant in tenants:
+            agreement = tenant.current_agreement_id
+            if not agreement or agreement.state != 'active' or not agreement.active:
+                continue
+
+            amounts = {
+                field_name: max(0, amount)
+                for field_name, amount in residuals.get((tenant.id, agreement.id), {}).items()
+            }
+            # Keep an outstanding dues record only if there are outstanding amounts
+            if not any(amounts.values()):
+                continue
+
+            vals = dict.fromkeys(self._DUES_AMOUNT_FIELDS, 0.0)
+            vals.update(amounts)
+            vals.update({
                 'tenant_id': tenant.id,
                 'room_id': tenant.current_room_id.id,
                 'agreement_id': agreement.id,
-                'rent_outstanding': rent_outstanding,
-                'deposit_outstanding': deposit_outstanding,
-                'parking_outstanding': parking_outstanding,
-                'other_charges_outstanding': other_charges_outstanding,
-                'last_payment_date': last_payment_date,
+                'last_payment_date': last_payment_dates.get(tenant.id) or agreement.start_date,
             })
+            vals_by_tenant[tenant.id] = vals
+        return vals_by_tenant
 
-    def _calculate_rent_outstanding(self, tenant, agreement):
-        """Calculate outstanding rent amount from unpaid invoices"""
-        # Query unpaid rent invoices for this tenant/agreement
-        unpaid_invoices = self.env['account.move'].search([
-            ('tenant_id', '=', tenant.id),
-            ('agreement_id', '=', agreement.id),
-            ('agreement_id.active', '=', True),  # Exclude archived agreements
-            ('move_type', '=', 'out_invoice'),
-            ('invoice_type', '=', 'rent'),
-            ('state', '=', 'posted'),
-            ('payment_state', 'in', ['not_paid', 'partial'])
-        ])
-        
-        # Sum the unpaid amounts (amount_residual)
-        total_outstanding = sum(unpaid_invoices.mapped('amount_residual'))
-        
-        return max(0, total_outstanding)
-    
-    def _calculate_deposit_outstanding(self, tenant, agreement):
-        """Calculate outstanding deposit amount from unpaid invoices"""
-        # Query unpaid deposit invoices for this tenant/agreement
-        unpaid_invoices = self.env['account.move'].search([
-            ('tenant_id', '=', tenant.id),
-            ('agreement_id', '=', agreement.id),
-            ('agreement_id.active', '=', True),  # Exclude archived agreements
-            ('move_type', '=', 'out_invoice'),
-            ('invoice_type', '=', 'deposit'),
-            ('state', '=', 'posted'),
-            ('payment_state', 'in', ['not_paid', 'partial'])
-        ])
-        
-        # Sum the unpaid amounts
-        total_outstanding = sum(unpaid_invoices.mapped('amount_residual'))
-        
-        return max(0, total_outstanding)
-    
-    def _calculate_parking_outstanding(self, tenant, agreement):
-        """Calculate outstanding parking charges from unpaid invoices"""
-        # Query unpaid parking invoices for this tenant/agreement
-        unpaid_invoices = self.env['account.move'].search([
-            ('tenant_id', '=', tenant.id),
-            ('agreement_id', '=', agreement.id),
-            ('agreement_id.active', '=', True),  # Exclude archived agreements
-            ('move_type', '=', 'out_invoice'),
-            ('invoice_type', 'in', ['parking', 'parking_charges']),
-            ('state', '=', 'posted'),
-            ('payment_state', 'in', ['not_paid', 'partial'])
-        ])
-        
-        # Sum the unpaid amounts
-        total_outstanding = sum(unpaid_invoices.mapped('amount_residual'))
-        
-        return max(0, total_outstanding)
-    
-    def _calculate_other_charges_outstanding(self, tenant, agreement):
-        """Calculate outstanding other charges from unpaid invoices"""
-        # Query unpaid other charges invoices for this tenant/agreement
-        unpaid_invoices = self.env['account.move'].search([
-            ('tenant_id', '=', tenant.id),
-            ('agreement_id', '=', agreement.id),
-            ('agreement_id.active', '=', True),  # Exclude archived agreements
-            ('move_type', '=', 'out_invoice'),
-            ('invoice_type', 'in', ['maintenance', 'utility', 'penalty', 'other']),
-            ('state', '=', 'posted'),
-            ('payment_state', 'in', ['not_paid', 'partial'])
-        ])
-        
-        # Sum the unpaid amounts
-        total_outstanding = sum(unpaid_invoices.mapped('amount_residual'))
-        
-        return max(0, total_outstanding)
+    def _create_for_tenant(self, tenant):
+        """Calculate and create outstanding dues record for a single tenant"""
+        vals = self._prepare_dues_vals(tenant).get(tenant.id)
+        if vals:
+            self.create(vals)
+
+    @api.model
+    def _get_residuals_by_category(self, tenant_ids):
+        """Sum unpaid residuals of posted customer invoices per dues category
+
+        :return: {(tenant_id, agreement_id): {amount field: residual}}
+        """
+        type_to_field = {
+            invoice_type: field_name
+            for field_name, invoice_types in self._DUES_CATEGORY_TYPES.items()
+            for invoice_type in invoice_types
+        }
+        groups = self.env['account.move']._read_group(
+            [
+                ('tenant_id', 'in', tenant_ids),
+                ('agreement_id.active', '=', True),  # Exclude archived agreements
+                ('move_type', '=', 'out_invoice'),
+                ('invoice_type', 'in', list(type_to_field)),
+                ('state', '=', 'posted'),
+                ('payment_state', 'in', ['not_paid', 'partial']),
+            ],
+            ['tenant_id', 'agreement_id', 'invoice_type'],
+            ['amount_residual:sum'],
+        )
+        residuals = defaultdict(dict)
+        for tenant, agreement, invoice_type, amount in groups:
+            amounts = residuals[(tenant.id, agreement.id)]
+            field_name = type_to_field[invoice_type]
+            amounts[field_name] = amounts.get(field_name, 0.0) + (amount or 0.0)
+        return residuals
+
+    @api.model
+    def _get_last_payment_dates(self, tenant_ids):
+        """Return {tenant_id: date of the latest active collection}"""
+        groups = self.env['property.collection']._read_group(
+            [
+                ('tenant_id', 'in', tenant_ids),
+                ('active', '=', True),
+                ('agreement_id.active', '=', True),  # Exclude archived agreements
+            ],
+            ['tenant_id'],
+            ['date:max'],
+        )
+        return {tenant.id: last_date for tenant, last_date in groups}
+
+    @api.model
+    def _apply_dues_diff(self, vals_by_tenant, existing):
+        """Insert, update or delete dues rows so ``existing`` matches the new values.
+
+        :param vals_by_tenant: {tenant_id: values} of the rows that should exist
+        :param existing: current dues rows in the refreshed scope
+        :return: dict with created, updated, deleted and unchanged counts
+        """
+        to_delete = self.browse()
+        kept = {}
+        for dues in existing:
+            tenant_id = dues.tenant_id.id
+            if tenant_id in kept or tenant_id not in vals_by_tenant:
+                # Stale row, or a duplicate left by an older refresh
+                to_delete |= dues
+            else:
+                kept[tenant_id] = dues
+
+        # Rows with identical changes are written together
+        updates = defaultdict(lambda: self.browse())
+        unchanged = 0
+        for tenant_id, dues in kept.items():
+            changes = self._dues_changes(dues, vals_by_tenant[tenant_id])
+            if changes:
+                updates[tuple(sorted(changes.items()))] |= dues
+            else:
+                unchanged += 1
+
+        to_create = [vals for tenant_id, vals in vals_by_tenant.items() if tenant_id not in kept]
+
+        if to_delete:
+            to_delete.unlink()
+        for changes, records in updates.items():
+            records.write(dict(changes))
+        for batch in split_every(self._DUES_BATCH_SIZE, to_create, list):
+            self.create(batch)
+
+        return {
+            'created': len(to_create),
+            'updated': sum(len(records) for records in updates.values()),
+            'deleted': len(to_delete),
+            'unchanged': unchanged,
+        }
+
+    def _dues_changes(self, dues, vals):
+        """Return the subset of ``vals`` that differs from the stored row"""
+        changes = {}
+        for field_name in self._DUES_MANY2ONE_FIELDS:
+            if dues[field_name].id != (vals.get(field_name) or False):
+                changes[field_name] = vals.get(field_name) or False
+        for field_name in self._DUES_AMOUNT_FIELDS:
+            if float_compare(dues[field_name], vals.get(field_name) or 0.0, precision_digits=2):
+                changes[field_name] = vals.get(field_name) or 0.0
+        if dues.last_payment_date != (vals.get('last_payment_date') or False):
+            changes['last_payment_date'] = vals.get('last_payment_date') or False
+        return changes
 
     def action_view_tenant_collections(self):
         """View all collections for this tenant"""
@@ -284,4 +443,175 @@ class PropertyOutstandingDues(models.Model):
     @api.model
     def cron_update_outstanding_dues(self):
         """Cron job to update outstanding dues daily"""
-        self.update_outstanding_dues()
\ No newline at end of file
+        self.update_outstanding_dues()
+
+    @api.model
+    def project_outstanding(self, target_date, pay_by_day=None, property_ids=None):
+        """Project portfolio outstanding at ``target_date`` without writing anything
+
+        Current invoice residuals are combined with the invoices the monthly
+        generator (``account.move.create_monthly_invoices``) will issue by
+        ``target_date``: one per invoice type and month, for active
+        auto-invoiced monthly agreements, from the month after the last
+        invoice of that type and never before the current month. Each is
+        issued on the agreement's invoice day and falls due after its
+        payment terms, as the generator does.
+
+        :param target_date: date the projection is evaluated at
+        :param pay_by_day: None assumes nobody pays; a day of month assumes
+            everything falling due after today is settled on that day of the
+            month, so only amounts due inside the projection window are paid
+        :param property_ids: optional property ids limiting the portfolio
+        :return: dict with total, by_bucket and by_property totals
+        """
+        today = fields.Date.today()
+        target_date = fields.Date.to_date(target_date)
+        aging_obj = self.env['property.outstanding.aging']
+        property_domain = [('property_id', 'in', property_ids)] if property_ids else []
+
+        # Amount items as (property_id, due date, amount)
+        items = [
+            (prop.id, due_date or today, amount or 0.0)
+            for prop, due_date, amount in aging_obj._read_group(
+                property_domain, ['property_id', 'invoice_date_due:day'], ['amount_residual:sum'])
+        ]
+
+        agreements = self.env['property.agreement'].search([
+            ('state', '=', 'active'),
+            ('auto_generate_invoices', '=', True),
+            ('payment_frequency', '=', 'monthly'),
+        ] + property_domain)
+        last_invoiced = {
+            (agreement.id, invoice_type): last_date
+            for agreement, invoice_type, last_date in self.env['account.move']._read_group(
+                [
+                    ('agreement_id', 'in', agreements.ids),
+                    ('move_type', '=', 'out_invoice'),
+                    ('state', '!=', 'cancel'),
+                ],
+                ['agreement_id', 'invoice_type'],
+                ['invoice_date:max'],
+            )
+        }
+        current_month = today.replace(day=1)
+        for agreement in agreements:
+            for invoice_type, amount in self._projection_charges(agreement):
+                month = current_month
+                last_date = last_invoiced.get((agreement.id, invoice_type))
+                if last_date:
+                    month = max(month, last_date.replace(day=1) + relativedelta(months=1))
+                while month <= target_date:
+                    # A month whose invoice day has passed is invoiced on the next run
+                    invoice_date = max(self._day_of_month(month, agreement.invoice_day or 1), today)
+                    if invoice_date > target_date or invoice_date > agreement.end_date:
+                        break
+                    if invoice_date >= agreement.start_date:
+                        due_date = invoice_date + timedelta(days=agreement.payment_terms or 30)
+                        items.append((agreement.property_id.id, due_date, amount))
+                    month += relativedelta(months=1)
+
+        paid_until = None
+        if pay_by_day:
+            paid_until = self._day_of_month(target_date, pay_by_day)
+            if paid_until > target_date:
+                paid_until = self._day_of_month(target_date - relativedelta(months=1), pay_by_day)
+
+        by_bucket = defaultdict(float)
+        by_property = defaultdict(lambda: defaultdict(float))
+        for property_id, due_date, amount in items:
+            # Arrears due by today stay unpaid whatever the payment assumption
+            if paid_until and today < due_date <= paid_until:
+                continue
+            bucket = aging_obj._bucket_for_days((target_date - due_date).days)
+            by_bucket[bucket] += amount
+            by_property[property_id][bucket] += amount
+
+        property_names = {
+            prop.id: prop.display_name
+            for prop in self.env['property.property'].browse([pid for pid in by_property if pid])
+        }
+        return {
+            'target_date': target_date,
+            'pay_by_day': pay_by_day,
+            'total': sum(by_bucket.values()),
+            'by_bucket': dict(by_bucket),
+            'by_property': [
+                {
+                    'property_id': property_id,
+                    'property_name': property_names.get(property_id, _('Unassigned')),
+                    'total': sum(buckets.values()),
+                    'by_bucket': dict(buckets),
+                }
+                for property_id, buckets in by_property.items()
+            ],
+        }
+
+    @api.model
+    def _projection_charges(self, agreement):
+        """Monthly invoices the generator issues for an agreement, as (invoice_type, amount)
+
+        The generator issues a single invoice per type and month, so only the
+        first monthly charge of each invoice type is billed.
+        """
+        charges = {'rent': agreement.rent_amount}
+        if agreement.parking_charges > 0:
+            charges['parking'] = agreement.parking_charges
+        for charge in agreement.other_charges_ids:
+            if charge.frequency == 'monthly' and charge.active:
+                invoice_type = charge.charge_id.charge_type
+                if invoice_type not in ['maintenance', 'utility', 'penalty']:
+                    invoice_type = 'other'
+                charges.setdefault(invoice_type, charge.amount)
+        return [(invoice_type, amount) for invoice_type, amount in charges.items() if amount > 0]
+
+    @api.model
+    def _day_of_month(self, month_date, day):
+        """``day`` in the month of ``month_date``, clamped to the month's length"""
+        return month_date + relativedelta(day=day)
+
+    @api.model
+    def cron_rollover_status(self):
+        """Cron job moving aging statuses across day thresholds
+
+        Only rows whose age crossed a status boundary since the previous run
+        are touched; amounts are left to the regular refresh.
+        """
+        params = self.env['ir.config_parameter'].sudo()
+        today = fields.Date.today()
+        last_run = fields.Date.to_date(params.get_param(self._ROLLOVER_PARAM) or False)
+        if last_run and last_run >= today:
+            return 0
+
+        dues_count = self._rollover_dues_status(last_run, today)
+        tenant_count = self.env['property.tenant']._rollover_outstanding_status(last_run, today)
+        params.set_param(self._ROLLOVER_PARAM, fields.Date.to_string(today))
+        _logger.info(f"Status rollover: {dues_count} dues rows and {tenant_count} tenants moved to a new bucket")
+        return dues_count + tenant_count
+
+    @api.model
+    def _rollover_dues_status(self, last_run, today):
+        """Recompute status of dues rows that crossed a threshold between two dates
+
+        A row crosses threshold T when its age was at most T days at
+        ``last_run`` and is over T days ``today``, i.e. its last payment date
+        falls in [last_run - T, today - T). Without a previous run every row
+        with an amount outstanding is recomputed.
+        """
+        self.flush_model(['last_payment_date', 'total_outstanding', 'status'])
+        query = """
+            SELECT id FROM property_outstanding_dues
+             WHERE total_outstanding > 0
+        """
+        params = []
+        if last_run:
+            ranges = []
+            for threshold in self._STATUS_THRESHOLDS:
+                ranges.append("(last_payment_date >= %s AND last_payment_date < %s)")
+                params += [last_run - timedelta(days=threshold), today - timedelta(days=threshold)]
+            query += f" AND ({' OR '.join(ranges)})"
+        self.env.cr.execute(query, params)
+        dues = self.browse([row[0] for row in self.env.cr.fetchall()])
+        if dues:
+            self.env.add_to_compute(self._fields['status'], dues)
+            dues.flush_recordset(['status'])
+        return len(dues)
\ No newline at end of file
@@ -0,0 +1,121 @@
+from odoo import models, fields, api, tools, _
+
+
+class PropertyPaymentJournalMap(models.Model):
+    _name = 'property.payment.journal.map'
+    _description = 'Collection Payment Method Journal'
+    _order = 'company_id, payment_method'
+    _rec_name = 'payment_method'
+
+    company_id = fields.Many2one('res.company', 'Company', required=True,
+                                 default=lambda self: self.env.company)
+    payment_method = fields.Selection(
+        lambda self: self.env['property.collection']._fields['payment_method'].selection,
+        string='Payment Method', required=True)
+    journal_id = fields.Many2one('account.journal', 'Journal', required=True,
+                                 domain="[('company_id', '=', company_id), ('type', 'in', ['cash', 'bank'])]")
+
+    _sql_constraints = [
+        ('unique_company_method', 'UNIQUE(company_id, payment_method)',
+         'Only one journal per payment method and company is allowed!'),
+    ]
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env.registry.clear_cache()
+        return records
+
+    def write(self, vals):
+        result = super().write(vals)
+        self.env.registry.clear_cache()
+        return result
+
+    def unlink(self):
+        result = super().unlink()
+        self.env.registry.clear_cache()
+        return result
+
+    @api.model
+    def _get_journal(self, company, payment_method):
+        """Journal used for collections paid with ``payment_method``"""
+        return self.env['account.journal'].browse(self._get_journal_id(company.id, payment_method))
+
+    @api.model
+    @tools.ormcache('company_id', 'payment_method')
+    def _get_journal_id(self, company_id, payment_method):
+        """Resolve the journal id of a (company, payment method) pair.
+
+        Cached per process; the cache is cleared whenever a mapping changes
+        or a journal this method can pick is added, removed, retyped, moved
+        or (de)activated. Without a mapping row the journal type implied by
+        the payment method is used.
+        """
+        mapping = self.sudo().search([
+            ('company_id', '=', company_id),
+            ('payment_method', '=', payment_method),
+        ], limit=1)
+        if mapping:
+            return mapping.journal_id.id
+
+        journal_obj = self.env['account.journal'].sudo()
+        # Map payment method to journal type
+        if payment_method in ['cash']:
+            journal_type = 'cash'
+        elif payment_method in ['bank_transfer', 'cheque', 'online', 'card']:
+            journal_type = 'bank'
+        elif payment_method == 'deposit_adjustment':
+            # Try to find a journal specifically for Deposit Adjustments
+            journal = journal_obj.search([
+                ('type', 'in', ['cash', 'bank', 'general']),
+                ('name', 'ilike', 'Deposit'),
+                ('company_id', '=', company_id),
+            ], limit=1)
+            if journal:
+                return journal.id
+            journal_type = 'cash'  # Fallback
+        else:
+            journal_type = 'cash'  # default
+
+        return journal_obj.search([
+            ('type', '=', journal_type),
+            ('company_id', '=', company_id),
+        ], limit=1).id
+
+
+class AccountJournal(models.Model):
+    _inherit = 'account.journal'
+
+    # Journal changes can alter which journal a payment method resolves to.
+    # Only journals _get_journal_id can pick, and only the fields it reads,
+    # clear the registry cache; other journal edits keep every ormcache.
+    _PAYMENT_JOURNAL_TYPES = ['cash', 'bank', 'general']
+    _PAYMENT_JOURNAL_FIELDS = {'type', 'company_id', 'active'}
+
+    def _affects_payment_journal(self):
+        return any(journal.type in self._PAYMENT_JOURNAL_TYPES for journal in self)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        journals = super().create(vals_list)
+        if journals._affects_payment_journal():
+            self.env.registry.clear_cache()
+        return journals
+
+    def write(self, vals):
+        # The deposit adjustment fallback matches on the journal name
+        renamed = 'name' in vals and any(
+            'deposit' in (name or '').lower() for name in self.mapped('name') + [vals['name']]
+        )
+        relevant = self._PAYMENT_JOURNAL_FIELDS & set(vals) and self._affects_payment_journal()
+        result = super().write(vals)
+        if renamed or relevant or ('type' in vals and self._affects_payment_journal()):
+            self.env.registry.clear_cache()
+        return result
+
+    def unlink(self):
+        relevant = self._affects_payment_journal()
+        result = super().unlink()
+        if relevant:
+            self.env.registry.clear_cache()
+        return result
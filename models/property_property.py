@@ -208,6 +208,12 @@ class PropertyProperty(models.Model):
             _logger.error(f"Error during computed fields recalculation: {str(e)}")
             raise
     
+    def action_refresh_outstanding_dues(self):
+        """Recompute outstanding dues for this property's tenants only"""
+        dues_obj = self.env['property.outstanding.dues']
+        stats = dues_obj.refresh_scope('property.property', [('id', 'in', self.ids)])
+        return dues_obj._refresh_scope_notification(stats)
+
     def action_recalculate_computed_fields(self):
         """Manual action to recalculate computed fields for the current property and its related records"""
         self.ensure_one()
@@ -1,7 +1,12 @@
 # -*- coding: utf-8 -*-
 
-from odoo import models, fields, api
-from datetime import datetime, timedelta
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import ValidationError
+from datetime import date, datetime, timedelta
+from dateutil.relativedelta import relativedelta
+import logging
+
+_logger = logging.getLogger(__name__)
 
 
 class PropertyStatement(models.Model):
@@ -10,6 +15,11 @@ class PropertyStatement(models.Model):
     _order = 'transaction_date asc, id asc'  # Changed to ascending for natural reading
     _rec_name = 'reference'
 
+    _sql_constraints = [
+        ('unique_agreement_transaction', 'UNIQUE(agreement_id, reference)',
+         'A statement entry with this reference already exists for the agreement!'),
+    ]
+
     tenant_id = fields.Many2one('property.tenant', string='Tenant', required=True, ondelete='cascade')
     transaction_date = fields.Date(string='Transaction Date', required=True, default=fields.Date.context_today)
     reference = fields.Char(string='Reference', required=True)
@@ -25,7 +35,8 @@ class PropertyStatement(models.Model):
     ], string='Transaction Type', required=True)
     debit_amount = fields.Monetary('Debit', currency_field='currency_id', default=0.0)
     credit_amount = fields.Monetary('Credit', currency_field='currency_id', default=0.0)
-    running_balance = fields.Float(string='Running Balance', digits=(16, 2), compute='_compute_running_balance', store=True)
+    running_balance = fields.Float(string='Running Balance', digits=(16, 2), readonly=True, copy=False,
+                                   help="Maintained incrementally from the tenant's ledger checkpoint")
     
     room_id = fields.Many2one('property.room', string='Room')
     agreement_id = fields.Many2one('property.agreement', string='Agreement', ondelete='cascade')
@@ -33,37 +44,239 @@ class PropertyStatement(models.Model):
     
     currency_id = fields.Many2one('res.currency', string='Currency', 
                                   default=lambda self: self.env.company.currency_id)
-    
-    @api.depends('tenant_id', 'transaction_date', 'debit_amount', 'credit_amount')
-    def _compute_running_balance(self):
-        """Compute running balance for statement entries using batch processing"""
-        # Group records by tenant for efficient batch processing
-        records_by_tenant = {}
-        for record in self:
-            if not record.tenant_id:
-                record.running_balance = 0.0
-                continue
-            if record.tenant_id.id not in records_by_tenant:
-                records_by_tenant[record.tenant_id.id] = []
-            records_by_tenant[record.tenant_id.id].append(record)
-        
-        # Process each tenant's statements as a batch
-        for tenant_id, records in records_by_tenant.items():
-            # Get ALL statements for this tenant, ordered correctly
-            all_statements = self.search([
-                ('tenant_id', '=', tenant_id)
-            ], order='transaction_date asc, id asc')
-            
-            # Calculate running balances in a single pass
-            balance = 0.0
-            balance_map = {}
-            for stmt in all_statements:
-                balance += stmt.debit_amount - stmt.credit_amount
-                balance_map[stmt.id] = balance
-            
-            # Apply calculated balances to the records being computed
-            for record in records:
-                record.running_balance = balance_map.get(record.id, 0.0)
+
+    # Fields whose change moves a row or alters the balance of every row after it
+    _LEDGER_FIELDS = ('tenant_id', 'transaction_date', 'debit_amount', 'credit_amount')
+
+    # Composite indexes matching the ledger's hot query shapes
+    _LEDGER_INDEXES = [
+        # Outstanding dues / payment stats: per tenant, agreement and type
+        ('property_statement_tenant_agreement_type_idx', ['tenant_id', 'agreement_id', 'transaction_type']),
+        # Schedule lookups: per agreement and type over a date range
+        ('property_statement_agreement_type_date_idx', ['agreement_id', 'transaction_type', 'transaction_date']),
+        # Reference lookups; normally already served by unique_agreement_transaction
+        ('property_statement_agreement_reference_idx', ['agreement_id', 'reference']),
+        # Ledger walks: one tenant ordered by (transaction_date, id)
+        ('property_statement_tenant_date_id_idx', ['tenant_id', 'transaction_date', 'id']),
+    ]
+
+    def init(self):
+        for advice in self.check_ledger_indexes(log=False):
+            if not advice['covered_by']:
+                tools.create_index(self.env.cr, advice['index'], self._table, advice['columns'])
+
+    @api.model
+    def check_ledger_indexes(self, log=True):
+        """Index advisor: report which known ledger query shapes lack a usable index.
+
+        A shape is covered when an existing btree index starts with its
+        columns in the same order.
+
+        :return: list of dicts with index, columns and covered_by (index name or False)
+        """
+        self.env.cr.execute("""
+            SELECT i.relname, array_agg(a.attname::text ORDER BY k.ord)
+              FROM pg_index x
+              JOIN pg_class c ON c.oid = x.indrelid
+              JOIN pg_class i ON i.oid = x.indexrelid
+              JOIN pg_am am ON am.oid = i.relam
+              CROSS JOIN LATERAL unnest(x.indkey) WITH ORDINALITY AS k(attnum, ord)
+              JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum = k.attnum
+             WHERE c.relname = %s
+               AND am.amname = 'btree'
+               AND x.indpred IS NULL
+          GROUP BY i.relname
+        """, [self._table])
+        existing = self.env.cr.fetchall()
+        
+        report = []
+        for index_name, columns in self._LEDGER_INDEXES:
+            covered_by = next(
+                (name for name, index_columns in existing if index_columns[:len(columns)] == columns),
+                False,
+            )
+            report.append({'index': index_name, 'columns': columns, 'covered_by': covered_by})
+            if log and not covered_by:
+                _logger.warning(f"Missing index on {self._table} ({', '.join(columns)}); "
+                                f"expected {index_name}")
+        return report
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        statements = super().create(vals_list)
+        self._ledger_touch(statements._ledger_positions())
+        return statements
+
+    def write(self, vals):
+        if not any(f in vals for f in self._LEDGER_FIELDS):
+            return super().write(vals)
+        # Old positions matter too: a row moved later still shifts the rows it left behind
+        positions = self._ledger_positions()
+        result = super().write(vals)
+        self._ledger_touch(positions + self._ledger_positions())
+        return result
+
+    def unlink(self):
+        positions = self._ledger_positions()
+        result = super().unlink()
+        self._ledger_touch(positions)
+        return result
+
+    # ========== INCREMENTAL RUNNING BALANCE ENGINE ==========
+    #
+    # Each tenant carries a checkpoint: the earliest (transaction_date, id)
+    # whose running balance may be stale. Everything before it is known good,
+    # so a recompute starts from the balance of the row just before the
+    # checkpoint and only walks the suffix of the ledger.
+
+    def _ledger_positions(self):
+        """Return (tenant_id, transaction_date, id) for each record in self"""
+        return [
+            (stmt.tenant_id.id, stmt.transaction_date, stmt.id)
+            for stmt in self
+            if stmt.tenant_id and stmt.transaction_date
+        ]
+
+    @api.model
+    def _ledger_touch(self, positions):
+        """Move tenant checkpoints back to the given positions and recompute.
+
+        With ``defer_running_balance`` in context the checkpoints are only
+        recorded; call :meth:`flush_running_balances` once the batch is done.
+        """
+        tenant_ids = self._ledger_mark_dirty(positions)
+        if tenant_ids and not self.env.context.get('defer_running_balance'):
+            self.flush_running_balances(tenant_ids)
+
+    @api.model
+    def _ledger_mark_dirty(self, positions):
+        """Store the earliest dirty position per tenant, keeping older checkpoints"""
+        earliest = {}
+        for tenant_id, transaction_date, stmt_id in positions:
+            key = (transaction_date, stmt_id)
+            if tenant_id not in earliest or key < earliest[tenant_id]:
+                earliest[tenant_id] = key
+        if not earliest:
+            return []
+        
+        self.env['property.tenant'].flush_model(['ledger_checkpoint_date', 'ledger_checkpoint_id'])
+        tenant_ids = list(earliest)
+        self.env.cr.execute("""
+            UPDATE property_tenant t
+               SET ledger_checkpoint_date = v.cp_date,
+                   ledger_checkpoint_id = v.cp_id
+              FROM unnest(%s::int[], %s::date[], %s::int[]) AS v(tenant_id, cp_date, cp_id)
+             WHERE t.id = v.tenant_id
+               AND (t.ledger_checkpoint_date IS NULL
+                    OR (t.ledger_checkpoint_date, t.ledger_checkpoint_id) > (v.cp_date, v.cp_id))
+        """, [
+            tenant_ids,
+            [earliest[t][0] for t in tenant_ids],
+            [earliest[t][1] for t in tenant_ids],
+        ])
+        self.env['property.tenant'].invalidate_model(['ledger_checkpoint_date', 'ledger_checkpoint_id'])
+        return tenant_ids
+
+    @api.model
+    def flush_running_balances(self, tenant_ids=None):
+        """Recompute running balances from each pending tenant checkpoint onward.
+
+        :param tenant_ids: tenants to process; all tenants with a pending
+                           checkpoint when omitted
+        :return: number of statement rows whose balance changed
+        """
+        self.flush_model()
+        self.env['property.tenant'].flush_model(['ledger_checkpoint_date', 'ledger_checkpoint_id'])
+        
+        query = """
+            SELECT id, ledger_checkpoint_date, ledger_checkpoint_id
+              FROM property_tenant
+             WHERE ledger_checkpoint_date IS NOT NULL
+        """
+        params = []
+        if tenant_ids is not None:
+            if not tenant_ids:
+                return 0
+            query += " AND id = ANY(%s)"
+            params.append(list(tenant_ids))
+        self.env.cr.execute(query, params)
+        checkpoints = self.env.cr.fetchall()
+        if not checkpoints:
+            return 0
+        
+        touched = 0
+        for tenant_id, cp_date, cp_id in checkpoints:
+            touched += self._recompute_ledger_suffix(tenant_id, cp_date, cp_id)
+        
+        # Monthly snapshots from the checkpoint month onward are now stale
+        self.env['property.statement.snapshot']._refresh_snapshots(
+            [(tenant_id, cp_date) for tenant_id, cp_date, __ in checkpoints]
+        )
+        
+        self.env.cr.execute("""
+            UPDATE property_tenant
+               SET ledger_checkpoint_date = NULL,
+                   ledger_checkpoint_id = NULL
+             WHERE id = ANY(%s)
+        """, [[row[0] for row in checkpoints]])
+        self.env['property.tenant'].invalidate_model(['ledger_checkpoint_date', 'ledger_checkpoint_id'])
+        self.invalidate_model(['running_balance'])
+        return touched
+
+    @api.model
+    def _recompute_ledger_suffix(self, tenant_id, from_date, from_id):
+        """Walk one tenant's ledger from (from_date, from_id) and fix stale balances"""
+        cr = self.env.cr
+        
+        # Opening balance is the (already correct) balance of the row just before
+        cr.execute("""
+            SELECT running_balance
+              FROM property_statement
+             WHERE tenant_id = %s
+               AND (transaction_date, id) < (%s, %s)
+          ORDER BY transaction_date DESC, id DESC
+             LIMIT 1
+        """, [tenant_id, from_date, from_id])
+        row = cr.fetchone()
+        balance = float(row[0] or 0.0) if row else 0.0
+        
+        cr.execute("""
+            SELECT id, debit_amount, credit_amount, running_balance
+              FROM property_statement
+             WHERE tenant_id = %s
+               AND (transaction_date, id) >= (%s, %s)
+          ORDER BY transaction_date ASC, id ASC
+        """, [tenant_id, from_date, from_id])
+        
+        changed_ids = []
+        changed_balances = []
+        for stmt_id, debit, credit, stored in cr.fetchall():
+            balance = round(balance + float(debit or 0.0) - float(credit or 0.0), 2)
+            if stored is None or abs(float(stored) - balance) >= 0.005:
+                changed_ids.append(stmt_id)
+                changed_balances.append(balance)
+        
+        if changed_ids:
+            self._write_running_balances(changed_ids, changed_balances)
+        return len(changed_ids)
+
+    @api.model
+    def _write_running_balances(self, statement_ids, balances):
+        """Write balances back in a single UPDATE"""
+        self.env.cr.execute("""
+            UPDATE property_statement s
+               SET running_balance = v.balance
+              FROM unnest(%s::int[], %s::numeric[]) AS v(id, balance)
+             WHERE s.id = v.id
+        """, [list(statement_ids), list(balances)])
+
+    @api.model
+    def rebuild_running_balances(self, tenant_ids):
+        """Force a full ledger walk for the given tenants"""
+        self._ledger_mark_dirty([(tenant_id, date.min, 0) for tenant_id in tenant_ids])
+        return self.flush_running_balances(tenant_ids)
+
+    # ========== END INCREMENTAL RUNNING BALANCE ENGINE ==========
 
     def name_get(self):
         result = []
@@ -75,7 +288,15 @@ class PropertyStatement(models.Model):
     @api.model
     def create_from_collection(self, collection):
         """Create statement entry from collection record"""
+        statements = self.create(self._prepare_collection_vals(collection))
+        return statements[0]
+
+    @api.model
+    def _prepare_collection_vals(self, collection):
+        """Build the statement vals of a collection; the payment line comes first"""
         description = f"Payment for {collection.collection_type}"
+        if collection.receipt_number:
+            description += f" ({collection.receipt_number})"
         if collection.room_id:
             description += f" - Room {collection.room_id.name}"
         
@@ -85,12 +306,13 @@ class PropertyStatement(models.Model):
         elif collection.collection_type == 'parking':
             transaction_type = 'parking'
         elif collection.collection_type == 'other':
-            transaction_type = 'other_charges'
+            transaction_type = 'other'
         
-        vals = {
+        vals_list = [{
             'tenant_id': collection.tenant_id.id,
             'transaction_date': collection.date,
-            'reference': collection.receipt_number or f"COL/{collection.id}",
+            # Keyed on the collection: receipt numbers are editable and may repeat
+            'reference': f"COL/{collection.id}",
             'description': description,
             'transaction_type': transaction_type,
             'credit_amount': collection.amount_collected,
@@ -98,15 +320,13 @@ class PropertyStatement(models.Model):
             'room_id': collection.room_id.id if collection.room_id else False,
             'agreement_id': collection.agreement_id.id if collection.agreement_id else False,
             'collection_id': collection.id,
-        }
-        
-        stmt = self.create(vals)
+        }]
         
         # If payment is via Deposit Adjustment, we need to create a balancing DEBIT entry
         # to show that the Deposit was used/reduced.
         # This increases "Deposit Outstanding" (Top-up needed) or reduces "Refundable Amount".
         if collection.payment_method == 'deposit_adjustment':
-            deposit_adjustment_vals = {
+            vals_list.append({
                 'tenant_id': collection.tenant_id.id,
                 'transaction_date': collection.date,
                 'reference': f"ADJ/{collection.id}",
@@ -116,140 +336,337 @@ class PropertyStatement(models.Model):
                 'credit_amount': 0.0,
                 'room_id': collection.room_id.id if collection.room_id else False,
                 'agreement_id': collection.agreement_id.id if collection.agreement_id else False,
-            }
-            self.create(deposit_adjustment_vals)
+            })
             
-        return stmt
+        return vals_list
+
+    @api.model
+    def insert_or_skip(self, vals_list):
+        """Bulk insert statement entries, letting the database drop duplicates.
+
+        Rows that would violate ``unique_agreement_transaction`` are skipped by
+        ``ON CONFLICT DO NOTHING`` in a single INSERT instead of one savepoint
+        per row. Running balances are then updated once for the new rows.
+
+        :param vals_list: list of statement vals (stored columns only)
+        :return: list aligned with ``vals_list`` holding the new statement id,
+                 or False where the row was skipped as a duplicate
+        """
+        if not vals_list:
+            return []
+        
+        # The raw INSERT bypasses the ORM's selection validation
+        valid_types = {value for value, __ in self._fields['transaction_type'].selection}
+        invalid_types = {vals.get('transaction_type') for vals in vals_list} - valid_types
+        if invalid_types:
+            raise ValidationError(_('Invalid statement transaction type: %s',
+                                    ', '.join(str(value) for value in invalid_types)))
+        
+        self.flush_model()
+        currency_id = self.env.company.currency_id.id
+        
+        def column(name, default=None):
+            return [vals.get(name) or default for vals in vals_list]
+        
+        self.env.cr.execute("""
+            INSERT INTO property_statement (
+                tenant_id, transaction_date, reference, description, transaction_type,
+                debit_amount, credit_amount, running_balance, room_id, agreement_id,
+                collection_id, currency_id, create_uid, create_date, write_uid, write_date
+            )
+            SELECT v.tenant_id, v.transaction_date, v.reference, v.description, v.transaction_type,
+                   v.debit_amount, v.credit_amount, 0, v.room_id, v.agreement_id,
+                   v.collection_id, v.currency_id, %s, now() at time zone 'UTC', %s, now() at time zone 'UTC'
+              FROM unnest(%s::int[], %s::date[], %s::varchar[], %s::text[], %s::varchar[],
+                          %s::numeric[], %s::numeric[], %s::int[], %s::int[], %s::int[], %s::int[])
+                   WITH ORDINALITY AS v(tenant_id, transaction_date, reference, description, transaction_type,
+                                        debit_amount, credit_amount, room_id, agreement_id, collection_id,
+                                        currency_id, seq)
+          ORDER BY v.seq
+            ON CONFLICT DO NOTHING
+         RETURNING id, agreement_id, reference
+        """, [
+            self.env.uid, self.env.uid,
+            column('tenant_id'),
+            [fields.Date.to_date(vals.get('transaction_date')) or fields.Date.context_today(self)
+             for vals in vals_list],
+            column('reference'),
+            column('description'),
+            column('transaction_type'),
+            column('debit_amount', 0.0),
+            column('credit_amount', 0.0),
+            column('room_id'),
+            column('agreement_id'),
+            column('collection_id'),
+            column('currency_id', currency_id),
+        ])
+        
+        # Map returned rows back to their input position by (agreement, reference)
+        inserted = {}
+        for stmt_id, agreement_id, reference in self.env.cr.fetchall():
+            inserted.setdefault((agreement_id, reference), []).append(stmt_id)
+        result = []
+        for vals in vals_list:
+            ids = inserted.get((vals.get('agreement_id') or None, vals.get('reference')))
+            result.append(ids.pop(0) if ids else False)
+        
+        created = self.browse([stmt_id for stmt_id in result if stmt_id])
+        self._ledger_touch(created._ledger_positions())
+        self.env['property.tenant']._invalidate_statement_totals(
+            list({vals['tenant_id'] for vals, stmt_id in zip(vals_list, result) if stmt_id})
+        )
+        return result
 
     @api.model
     def create_from_agreement(self, agreement):
-        """Create statement entries from agreement charges"""
-        statements = self.env['property.statement']
+        """Create statement entries from agreement charges
+
+        Lines whose reference already exists for the agreement are skipped,
+        so agreements that keep part of their entries can be regenerated.
+        """
+        # One batched insert: the running balance engine then walks the ledger once
+        statement_ids = self.insert_or_skip(self._prepare_agreement_schedule(agreement))
+        return self.browse([stmt_id for stmt_id in statement_ids if stmt_id])
+
+    @api.model
+    def _prepare_agreement_schedule(self, agreement, end_limit=None, include_one_off=True):
+        """Build the vals of every due line of an agreement, in memory.
+
+        Covers the one-off deposits on the start date and, for each month from
+        the start date up to ``end_limit``, rent, parking and monthly other
+        charges. ``end_limit`` defaults to the earlier of the agreement end
+        date and today so future months are never charged. Pass
+        ``include_one_off=False`` to get the monthly lines only.
+        """
+        if end_limit is None:
+            end_limit = min(agreement.end_date, fields.Date.today())
+        
+        common = {
+            'tenant_id': agreement.tenant_id.id,
+            'room_id': agreement.room_id.id,
+            'agreement_id': agreement.id,
+            'credit_amount': 0.0,
+        }
+        vals_list = []
         
         # Security deposit entry
-        if agreement.deposit_amount > 0:
-            vals = {
-                'tenant_id': agreement.tenant_id.id,
-                'transaction_date': agreement.start_date,
-                'reference': f"AGR/{agreement.id}/DEPOSIT",
-                'description': f"Security deposit for agreement {agreement.name}",
-                'transaction_type': 'deposit',
-                'debit_amount': agreement.deposit_amount,
-                'credit_amount': 0.0,
-                'room_id': agreement.room_id.id,
-                'agreement_id': agreement.id,
-            }
-            statements += self.create(vals)
+        if include_one_off and agreement.deposit_amount > 0:
+            vals_list.append(dict(common,
+                transaction_date=agreement.start_date,
+                reference=f"AGR/{agreement.id}/DEPOSIT",
+                description=f"Security deposit for agreement {agreement.name}",
+                transaction_type='deposit',
+                debit_amount=agreement.deposit_amount,
+            ))
         
         # Parking Remote Deposit (if > 0)
-        if agreement.parking_remote_deposit > 0:
-            vals = {
-                'tenant_id': agreement.tenant_id.id,
-                'transaction_date': agreement.start_date,
-                'reference': f"AGR/{agreement.id}/REMOTE_DEPOSIT",
-                'description': f"Parking remote deposit for agreement {agreement.name}",
-                'transaction_type': 'deposit',
-                'debit_amount': agreement.parking_remote_deposit,
-                'credit_amount': 0.0,
-                'room_id': agreement.room_id.id,
-                'agreement_id': agreement.id,
-            }
-            statements += self.create(vals)
-        
-        # Monthly rent entries - only create up to today (never future months)
-        today = fields.Date.today()
-        
-        # Use the earlier of: agreement end_date or today
-        # This ensures we never create future charges
-        end_limit = min(agreement.end_date, today)
-        
-        current_date = agreement.start_date
-        while current_date <= end_limit:
+        if include_one_off and agreement.parking_remote_deposit > 0:
+            vals_list.append(dict(common,
+                transaction_date=agreement.start_date,
+                reference=f"AGR/{agreement.id}/REMOTE_DEPOSIT",
+                description=f"Parking remote deposit for agreement {agreement.name}",
+                transaction_type='deposit',
+                debit_amount=agreement.parking_remote_deposit,
+            ))
+        
+        # Keyed on the charge line: one agreement may bill the same charge twice
+        monthly_charges = [
+            (charge.id, charge.charge_id.name, charge.amount)
+            for charge in agreement.other_charges_ids
+            if charge.amount > 0 and charge.frequency == 'monthly'
+        ]
+        
+        for current_date in self._agreement_months(agreement.start_date, end_limit):
+            month_key = current_date.strftime('%Y%m')
+            month_label = current_date.strftime('%B %Y')
+            
             # 1. Rent
-            vals = {
-                'tenant_id': agreement.tenant_id.id,
-                'transaction_date': current_date,
-                'reference': f"AGR/{agreement.id}/RENT/{current_date.strftime('%Y%m')}",
-                'description': f"Monthly rent for {current_date.strftime('%B %Y')}",
-                'transaction_type': 'rent',
-                'debit_amount': agreement.rent_amount,
-                'credit_amount': 0.0,
-                'room_id': agreement.room_id.id,
-                'agreement_id': agreement.id,
-            }
-            statements += self.create(vals)
+            vals_list.append(dict(common,
+                transaction_date=current_date,
+                reference=f"AGR/{agreement.id}/RENT/{month_key}",
+                description=f"Monthly rent for {month_label}",
+                transaction_type='rent',
+                debit_amount=agreement.rent_amount,
+            ))
             
             # 2. Parking Charges
             if agreement.parking_charges > 0:
-                vals = {
-                    'tenant_id': agreement.tenant_id.id,
-                    'transaction_date': current_date,
-                    'reference': f"AGR/{agreement.id}/PARKING/{current_date.strftime('%Y%m')}",
-                    'description': f"Monthly parking charges for {current_date.strftime('%B %Y')}",
-                    'transaction_type': 'parking',
-                    'debit_amount': agreement.parking_charges,
-                    'credit_amount': 0.0,
-                    'room_id': agreement.room_id.id,
-                    'agreement_id': agreement.id,
-                }
-                statements += self.create(vals)
+                vals_list.append(dict(common,
+                    transaction_date=current_date,
+                    reference=f"AGR/{agreement.id}/PARKING/{month_key}",
+                    description=f"Monthly parking charges for {month_label}",
+                    transaction_type='parking',
+                    debit_amount=agreement.parking_charges,
+                ))
             
             # 3. Monthly Other Charges
-            for charge in agreement.other_charges_ids:
-                if charge.amount > 0 and charge.frequency == 'monthly':
-                    vals = {
-                        'tenant_id': agreement.tenant_id.id,
-                        'transaction_date': current_date,
-                        'reference': f"AGR/{agreement.id}/CHARGE/{charge.charge_id.name}/{current_date.strftime('%Y%m')}",
-                        'description': f"{charge.charge_id.name} for {current_date.strftime('%B %Y')}",
-                        'transaction_type': 'other',
-                        'debit_amount': charge.amount,
-                        'credit_amount': 0.0,
-                        'room_id': agreement.room_id.id,
-                        'agreement_id': agreement.id,
-                    }
-                    statements += self.create(vals)
-            
-            # Move to next month
-            if current_date.month == 12:
-                current_date = current_date.replace(year=current_date.year + 1, month=1)
-            else:
-                current_date = current_date.replace(month=current_date.month + 1)
-        
-        return statements
+            for charge_line_id, charge_name, amount in monthly_charges:
+                vals_list.append(dict(common,
+                    transaction_date=current_date,
+                    reference=f"AGR/{agreement.id}/CHARGE/{charge_line_id}/{month_key}",
+                    description=f"{charge_name} for {month_label}",
+                    transaction_type='other',
+                    debit_amount=amount,
+                ))
+        
+        return vals_list
+
+    @api.model
+    def _schedule_key(self, vals):
+        """Identity of a scheduled line: (agreement, type, reference, YYYYMM)
+
+        Rent and parking are identified by month alone, whatever their
+        reference, so imported or legacy rows count as existing. Other
+        charges share a type and keep their per-charge reference.
+        """
+        return (
+            vals['agreement_id'],
+            vals['transaction_type'],
+            vals['reference'] if vals['transaction_type'] == 'other' else None,
+            vals['transaction_date'].strftime('%Y%m'),
+        )
+
+    @api.model
+    def _existing_schedule_keys(self, agreement_ids):
+        """Load the schedule keys already present for the agreements in one query
+
+        Only charges (debits) count; collection payments share the rent type.
+        """
+        self.flush_model(['agreement_id', 'transaction_type', 'reference', 'transaction_date', 'debit_amount'])
+        self.env.cr.execute("""
+            SELECT agreement_id,
+                   transaction_type,
+                   CASE WHEN transaction_type = 'other' THEN reference END,
+                   to_char(transaction_date, 'YYYYMM')
+              FROM property_statement
+             WHERE agreement_id = ANY(%s)
+               AND transaction_type IN ('rent', 'parking', 'other')
+               AND debit_amount > 0
+        """, [list(agreement_ids)])
+        return set(self.env.cr.fetchall())
+
+    @api.model
+    def _last_rent_months(self, agreement_ids):
+        """Return {agreement_id: 'YYYYMM'} of the latest rent charge of each agreement"""
+        self.env.cr.execute("""
+            SELECT agreement_id, to_char(max(transaction_date), 'YYYYMM')
+              FROM property_statement
+             WHERE agreement_id = ANY(%s)
+               AND transaction_type = 'rent'
+               AND debit_amount > 0
+          GROUP BY agreement_id
+        """, [list(agreement_ids)])
+        return dict(self.env.cr.fetchall())
+
+    @api.model
+    def _agreement_months(self, start_date, end_limit):
+        """Yield the monthly due dates from start_date up to end_limit (inclusive)"""
+        months = 0
+        current_date = start_date
+        while current_date <= end_limit:
+            yield current_date
+            months += 1
+            # Offset from the start date so a 31st start never drifts to the 28th
+            current_date = start_date + relativedelta(months=months)
     
+    # Tenants per window-function UPDATE; bounds lock time and sort memory
+    _BALANCE_SQL_CHUNK_SIZE = 500
+
     @api.model
-    def cron_recalculate_running_balances(self):
-        """Recalculate running balances for all statement entries"""
-        import logging
-        _logger = logging.getLogger(__name__)
-        
-        # Get all statement entries
-        all_statements = self.env['property.statement'].search([], order='transaction_date asc, id asc')
-        
-        if not all_statements:
+    def cron_recalculate_running_balances(self, mode='sql', chunk_size=None):
+        """Recalculate running balances for all statement entries
+
+        :param mode: 'sql' computes balances set-based in the database,
+                     'python' walks each ledger through the incremental engine
+        """
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT DISTINCT tenant_id
+              FROM property_statement
+             WHERE tenant_id IS NOT NULL
+          ORDER BY tenant_id
+        """)
+        tenant_ids = [row[0] for row in self.env.cr.fetchall()]
+        
+        if not tenant_ids:
             _logger.info("No statement entries found to recalculate")
             return True
         
-        _logger.info(f"Recalculating running balances for {len(all_statements)} statements...")
+        _logger.info(f"Recalculating running balances for {len(tenant_ids)} tenant ledgers ({mode} mode)...")
         
-        # Trigger recomputation for all statements
-        # This will use the _compute_running_balance method
-        all_statements._compute_running_balance()
+        if mode == 'python':
+            touched = self.rebuild_running_balances(tenant_ids)
+        else:
+            touched = self.recalculate_running_balances_sql(tenant_ids, chunk_size=chunk_size)
         
-        _logger.info(f"Running balances recalculated successfully")
+        _logger.info(f"Running balances recalculated successfully ({touched} entries updated)")
         
         return True
 
+    @api.model
+    def recalculate_running_balances_sql(self, tenant_ids, chunk_size=None):
+        """Recompute running balances with a window function, tenant chunk by chunk.
+
+        Only rows whose stored balance differs are written, and the tenants'
+        ledger checkpoints are cleared since their ledgers are now fully clean.
+
+        :return: number of statement rows whose balance changed
+        """
+        chunk_size = chunk_size or self._BALANCE_SQL_CHUNK_SIZE
+        cr = self.env.cr
+        self.flush_model()
+        self.env['property.tenant'].flush_model(['ledger_checkpoint_date', 'ledger_checkpoint_id'])
+        
+        touched = 0
+        for start in range(0, len(tenant_ids), chunk_size):
+            chunk = list(tenant_ids[start:start + chunk_size])
+            cr.execute("""
+                WITH computed AS (
+                    SELECT id,
+                           ROUND(SUM(COALESCE(debit_amount, 0) - COALESCE(credit_amount, 0)) OVER (
+                               PARTITION BY tenant_id
+                               ORDER BY transaction_date, id
+                               ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+                           )::numeric, 2) AS balance
+                      FROM property_statement
+                     WHERE tenant_id = ANY(%s)
+                )
+                UPDATE property_statement s
+                   SET running_balance = c.balance
+                  FROM computed c
+                 WHERE s.id = c.id
+                   AND s.running_balance IS DISTINCT FROM c.balance
+            """, [chunk])
+            touched += cr.rowcount
+            self.env['property.statement.snapshot']._refresh_snapshots(
+                [(tenant_id, None) for tenant_id in chunk]
+            )
+            cr.execute("""
+                UPDATE property_tenant
+                   SET ledger_checkpoint_date = NULL,
+                       ledger_checkpoint_id = NULL
+                 WHERE id = ANY(%s)
+                   AND ledger_checkpoint_date IS NOT NULL
+            """, [chunk])
+            _logger.info(f"Running balance chunk {start // chunk_size + 1}: "
+                         f"{len(chunk)} tenants, {touched} entries updated so far")
+        
+        self.env['property.tenant'].invalidate_model(['ledger_checkpoint_date', 'ledger_checkpoint_id'])
+        self.invalidate_model(['running_balance'])
+        return touched
+
 
 class PropertyTenant(models.Model):
     _inherit = 'property.tenant'
 
     statement_ids = fields.One2many('property.statement', 'tenant_id', string='Statement of Account')
     statement_count = fields.Integer(string='Statement Entries', compute='_compute_statement_count')
-    total_debits = fields.Float(string='Total Debits', compute='_compute_statement_totals')
-    total_credits = fields.Float(string='Total Credits', compute='_compute_statement_totals')
-    current_balance = fields.Float(string='Current Balance', compute='_compute_statement_totals')
+    total_debits = fields.Float(string='Total Debits', compute='_compute_statement_totals', store=True)
+    total_credits = fields.Float(string='Total Credits', compute='_compute_statement_totals', store=True)
+    current_balance = fields.Float(string='Current Balance', compute='_compute_statement_totals', store=True)
+    ledger_checkpoint_date = fields.Date(string='Ledger Checkpoint Date', readonly=True, copy=False,
+                                         help="Earliest statement date whose running balance is pending recomputation")
+    ledger_checkpoint_id = fields.Integer(string='Ledger Checkpoint Entry', readonly=True, copy=False)
 
     @api.depends('statement_ids')
     def _compute_statement_count(self):
@@ -258,16 +675,39 @@ class PropertyTenant(models.Model):
 
     @api.depends('statement_ids.debit_amount', 'statement_ids.credit_amount', 'statement_ids.agreement_id.state')
     def _compute_statement_totals(self):
-        for tenant in self:
-            # Only count statement entries from ACTIVE agreements
-            # Exclude terminated agreements to match outstanding dues logic
-            active_statements = tenant.statement_ids.filtered(
-                lambda s: not s.agreement_id or s.agreement_id.state == 'active'
+        # Only count statement entries from ACTIVE agreements
+        # Exclude terminated agreements to match outstanding dues logic
+        tenant_ids = [tenant._origin.id for tenant in self if tenant._origin.id]
+        totals = {}
+        if tenant_ids:
+            groups = self.env['property.statement']._read_group(
+                [
+                    ('tenant_id', 'in', tenant_ids),
+                    '|', ('agreement_id', '=', False), ('agreement_id.state', '=', 'active'),
+                ],
+                groupby=['tenant_id'],
+                aggregates=['debit_amount:sum', 'credit_amount:sum'],
             )
-            
-            tenant.total_debits = sum(active_statements.mapped('debit_amount'))
-            tenant.total_credits = sum(active_statements.mapped('credit_amount'))
-            tenant.current_balance = tenant.total_debits - tenant.total_credits
+            totals = {tenant.id: (debits or 0.0, credits or 0.0) for tenant, debits, credits in groups}
+        
+        for tenant in self:
+            debits, credits = totals.get(tenant._origin.id, (0.0, 0.0))
+            tenant.total_debits = debits
+            tenant.total_credits = credits
+            tenant.current_balance = debits - credits
+
+    @api.model
+    def _invalidate_statement_totals(self, tenant_ids):
+        """Queue a batch recompute of stored statement totals.
+
+        Needed after statement rows are written with raw SQL, which the ORM
+        dependency tracking does not see.
+        """
+        tenants = self.browse(tenant_ids).exists()
+        if not tenants:
+            return
+        for fname in ('total_debits', 'total_credits', 'current_balance'):
+            self.env.add_to_compute(self._fields[fname], tenants)
 
     def action_view_statement(self):
         """Action to view tenant's statement of account"""
@@ -307,29 +747,46 @@ class PropertyCollection(models.Model):
     @api.model_create_multi
     def create(self, vals_list):
         collections = super().create(vals_list)
-        for collection in collections:
-            # Only create statement for verified/deposited collections
-            if collection.tenant_id and collection.status in ['verified', 'deposited']:
-                statement = self.env['property.statement'].create_from_collection(collection)
-                collection.statement_id = statement.id
+        # Only create statements for verified/deposited collections, in one batch
+        collections.filtered(
+            lambda c: c.tenant_id and c.status in ['verified', 'deposited'] and not c.statement_id
+        )._create_statements_bulk()
         return collections
 
     def write(self, vals):
         result = super().write(vals)
-        for collection in self:
-            if 'status' in vals and vals['status'] in ['collected', 'verified', 'deposited'] and collection.tenant_id and not collection.statement_id:
-                try:
-                    # Use savepoint to isolate constraint violations
-                    with self.env.cr.savepoint():
-                        statement = self.env['property.statement'].create_from_collection(collection)
-                        collection.statement_id = statement.id
-                except Exception as e:
-                    # Skip duplicates silently (SQL constraint violation)
-                    if 'unique_agreement_transaction' not in str(e) and 'duplicate' not in str(e).lower():
-                        import logging
-                        _logger = logging.getLogger(__name__)
-                        _logger.error(f"Failed to create statement for collection {collection.id}: {str(e)}")
+        if 'status' in vals and vals['status'] in ['collected', 'verified', 'deposited']:
+            self.filtered(lambda c: c.tenant_id and not c.statement_id)._create_statements_bulk()
         return result
+
+    def _create_statements_bulk(self):
+        """Create the statement entries of these collections in one insert-or-skip batch
+
+        :return: (created_count, skipped_count)
+        """
+        statement_obj = self.env['property.statement']
+        vals_list = []
+        owners = []
+        for collection in self:
+            collection_vals = statement_obj._prepare_collection_vals(collection)
+            vals_list.extend(collection_vals)
+            # Only the payment line (first) is linked back to the collection
+            owners.extend([collection.id] + [False] * (len(collection_vals) - 1))
+        
+        results = statement_obj.insert_or_skip(vals_list)
+        
+        links = [(owner, stmt_id) for owner, stmt_id in zip(owners, results) if owner and stmt_id]
+        skipped_count = sum(1 for owner, stmt_id in zip(owners, results) if owner and not stmt_id)
+        if links:
+            self.flush_model(['statement_id'])
+            self.env.cr.execute("""
+                UPDATE property_collection c
+                   SET statement_id = v.statement_id
+                  FROM unnest(%s::int[], %s::int[]) AS v(collection_id, statement_id)
+                 WHERE c.id = v.collection_id
+            """, [[link[0] for link in links], [link[1] for link in links]])
+            self.invalidate_model(['statement_id'])
+        return len(links), skipped_count
     
     @api.model
     def cron_create_missing_collection_statements(self):
@@ -341,32 +798,12 @@ class PropertyCollection(models.Model):
             ('tenant_id', '!=', False)
         ])
         
-        created_count = 0
-        skipped_count = 0
-        for collection in collections:
-            # Use savepoint to isolate constraint violations
-            try:
-                with self.env.cr.savepoint():
-                    statement = self.env['property.statement'].create_from_collection(collection)
-                    collection.statement_id = statement.id
-                    created_count += 1
-            except Exception as e:
-                # Skip duplicates silently (SQL constraint violation)
-                error_msg = str(e)
-                if 'unique_agreement_transaction' in error_msg or 'duplicate' in error_msg.lower():
-                    skipped_count += 1
-                else:
-                    # Log other errors
-                    import logging
-                    _logger = logging.getLogger(__name__)
-                    _logger.error(f"Failed to create statement for collection {collection.id}: {error_msg}")
+        created_count, skipped_count = collections._create_statements_bulk()
         
-        import logging
-        _logger = logging.getLogger(__name__)
         _logger.info(f"Created statement entries for {created_count} collections (skipped {skipped_count} duplicates)")
         
         return True
-    
+
 
 
 
@@ -409,15 +846,19 @@ class PropertyAgreement(models.Model):
         ])
         
         generated_count = 0
+        statement_obj = self.env['property.statement'].with_context(defer_running_balance=True)
         for agreement in agreements:
             try:
-                self.env['property.statement'].create_from_agreement(agreement)
+                with self.env.cr.savepoint():
+                    statement_obj.create_from_agreement(agreement)
                 generated_count += 1
             except Exception as e:
                 import logging
                 _logger = logging.getLogger(__name__)
                 _logger.error(f"Failed to generate statement for agreement {agreement.id}: {str(e)}")
         
+        statement_obj.flush_running_balances(agreements.mapped('tenant_id').ids)
+        
         import logging
         _logger = logging.getLogger(__name__)
         _logger.info(f"Generated statement entries for {generated_count} out of {len(agreements)} agreements")
@@ -430,7 +871,8 @@ class PropertyAgreement(models.Model):
         
         # Delete ALL rent and deposit statement entries
         # This includes both active ones AND orphaned ones (where agreement was deleted)
-        all_statements = self.env['property.statement'].search([
+        statement_obj = self.env['property.statement'].with_context(defer_running_balance=True)
+        all_statements = statement_obj.search([
             ('transaction_type', 'in', ['rent', 'deposit'])
             # Removed agreement_id filter to catch orphaned entries too
         ])
@@ -449,13 +891,17 @@ class PropertyAgreement(models.Model):
         regenerated_count = 0
         for agreement in agreements:
             try:
-                self.env['property.statement'].create_from_agreement(agreement)
+                with self.env.cr.savepoint():
+                    statement_obj.create_from_agreement(agreement)
                 regenerated_count += 1
             except Exception as e:
                 import logging
                 _logger = logging.getLogger(__name__)
                 _logger.error(f"Failed to regenerate statement for agreement {agreement.id}: {str(e)}")
         
+        # Walk every touched ledger once; includes tenants whose entries were only deleted
+        statement_obj.flush_running_balances()
+        
         import logging
         _logger = logging.getLogger(__name__)
         _logger.info(f"Regenerated statement entries for {regenerated_count} active agreements")
@@ -470,126 +916,39 @@ class PropertyAgreement(models.Model):
         
         # Find all ACTIVE agreements
         agreements = self.search([('state', '=', 'active'), ('active', '=', True)])
+        if not agreements:
+            return True
         
-        total_created = 0
-        agreements_updated = 0
+        statement_obj = self.env['property.statement']
+        existing_keys = statement_obj._existing_schedule_keys(agreements.ids)
+        last_rent_months = statement_obj._last_rent_months(agreements.ids)
         
+        vals_list = []
+        created_by_agreement = {}
         for agreement in agreements:
             try:
-                # Get existing rent statement entries for this agreement
-                existing_statements = self.env['property.statement'].search([
-                    ('agreement_id', '=', agreement.id),
-                    ('transaction_type', '=', 'rent')
-                ], order='transaction_date desc')
-                
-                # Determine the starting point for new entries
-                today = fields.Date.today()
-                end_limit = min(agreement.end_date, today)
-                
-                if existing_statements:
-                    # Get the last rent entry date
-                    last_rent_date = existing_statements[0].transaction_date
-                    # Start from the month AFTER the last entry
-                    if last_rent_date.month == 12:
-                        start_date = last_rent_date.replace(year=last_rent_date.year + 1, month=1)
-                    else:
-                        start_date = last_rent_date.replace(month=last_rent_date.month + 1)
-                else:
-                    # No existing rent entries, start from agreement start
-                    start_date = agreement.start_date
-                
-                # Create missing rent entries
-                current_date = start_date
-                created_count = 0
-                
-                while current_date <= end_limit:
-                    # 1. Rent
-                    existing_rent = self.env['property.statement'].search([
-                        ('agreement_id', '=', agreement.id),
-                        ('transaction_type', '=', 'rent'),
-                        ('transaction_date', '=', current_date)
-                    ], limit=1)
-                    
-                    if not existing_rent:
-                        vals = {
-                            'tenant_id': agreement.tenant_id.id,
-                            'transaction_date': current_date,
-                            'reference': f"AGR/{agreement.id}/RENT/{current_date.strftime('%Y%m')}",
-                            'description': f"Monthly rent for {current_date.strftime('%B %Y')}",
-                            'transaction_type': 'rent',
-                            'debit_amount': agreement.rent_amount,
-                            'credit_amount': 0.0,
-                            'room_id': agreement.room_id.id,
-                            'agreement_id': agreement.id,
-                        }
-                        self.env['property.statement'].create(vals)
-                        created_count += 1
-                        total_created += 1
-
-                    # 2. Parking Charges
-                    if agreement.parking_charges > 0:
-                        existing_parking = self.env['property.statement'].search([
-                            ('agreement_id', '=', agreement.id),
-                            ('transaction_type', '=', 'parking'),
-                            ('transaction_date', '=', current_date)
-                        ], limit=1)
-                        
-                        if not existing_parking:
-                            vals = {
-                                'tenant_id': agreement.tenant_id.id,
-                                'transaction_date': current_date,
-                                'reference': f"AGR/{agreement.id}/PARKING/{current_date.strftime('%Y%m')}",
-                                'description': f"Monthly parking charges for {current_date.strftime('%B %Y')}",
-                                'transaction_type': 'parking',
-                                'debit_amount': agreement.parking_charges,
-                                'credit_amount': 0.0,
-                                'room_id': agreement.room_id.id,
-                                'agreement_id': agreement.id,
-                            }
-                            self.env['property.statement'].create(vals)
-                            created_count += 1
-                            total_created += 1
-                    
-                    # 3. Monthly Other Charges
-                    for charge in agreement.other_charges_ids:
-                        if charge.amount > 0 and charge.frequency == 'monthly':
-                            # Check if this specific charge already exists for this month
-                            # We use the reference pattern to uniquely identify it
-                            charge_ref = f"AGR/{agreement.id}/CHARGE/{charge.charge_id.name}/{current_date.strftime('%Y%m')}"
-                            existing_charge = self.env['property.statement'].search([
-                                ('agreement_id', '=', agreement.id),
-                                ('reference', '=', charge_ref)
-                            ], limit=1)
-                            
-                            if not existing_charge:
-                                vals = {
-                                    'tenant_id': agreement.tenant_id.id,
-                                    'transaction_date': current_date,
-                                    'reference': charge_ref,
-                                    'description': f"{charge.charge_id.name} for {current_date.strftime('%B %Y')}",
-                                    'transaction_type': 'other',
-                                    'debit_amount': charge.amount,
-                                    'credit_amount': 0.0,
-                                    'room_id': agreement.room_id.id,
-                                    'agreement_id': agreement.id,
-                                }
-                                self.env['property.statement'].create(vals)
-                                created_count += 1
-                                total_created += 1
-                    
-                    # Move to next month
-                    if current_date.month == 12:
-                        current_date = current_date.replace(year=current_date.year + 1, month=1)
-                    else:
-                        current_date = current_date.replace(month=current_date.month + 1)
-                
-                if created_count > 0:
-                    agreements_updated += 1
-                    _logger.info(f"Created {created_count} missing statement entries for agreement {agreement.id}")
-                    
+                schedule = statement_obj._prepare_agreement_schedule(agreement, include_one_off=False)
             except Exception as e:
                 _logger.error(f"Failed to update statement for agreement {agreement.id}: {str(e)}")
+                continue
+            
+            # Like before, only months after the last rent entry are filled in
+            last_rent_month = last_rent_months.get(agreement.id, '')
+            missing = [
+                vals for vals in schedule
+                if vals['transaction_date'].strftime('%Y%m') > last_rent_month
+                and statement_obj._schedule_key(vals) not in existing_keys
+            ]
+            if missing:
+                vals_list.extend(missing)
+                created_by_agreement[agreement.id] = len(missing)
+        
+        if vals_list:
+            statement_obj.insert_or_skip(vals_list)
         
-        _logger.info(f"Statement update complete: {total_created} entries created for {agreements_updated} agreements")
+        for agreement_id, created_count in created_by_agreement.items():
+            _logger.info(f"Created {created_count} missing statement entries for agreement {agreement_id}")
         
-        return True
\ No newline at end of file
+        _logger.info(f"Statement update complete: {len(vals_list)} entries created for {len(created_by_agreement)} agreements")
+        
+        return True
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, tools
+from dateutil.relativedelta import relativedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class PropertyStatementArchive(models.Model):
+    _name = 'property.statement.archive'
+    _description = 'Archived Statement Entry'
+    _order = 'transaction_date asc, original_id asc'
+    _rec_name = 'reference'
+
+    original_id = fields.Integer(string='Original Entry ID', readonly=True)
+    tenant_id = fields.Many2one('property.tenant', string='Tenant', required=True, ondelete='cascade', index=True)
+    transaction_date = fields.Date(string='Transaction Date', required=True)
+    reference = fields.Char(string='Reference', required=True)
+    description = fields.Text(string='Description')
+    transaction_type = fields.Selection(
+        lambda self: self.env['property.statement']._fields['transaction_type'].selection,
+        string='Transaction Type', required=True)
+    debit_amount = fields.Monetary('Debit', currency_field='currency_id', default=0.0)
+    credit_amount = fields.Monetary('Credit', currency_field='currency_id', default=0.0)
+    running_balance = fields.Float(string='Running Balance at Archive', digits=(16, 2))
+    room_id = fields.Many2one('property.room', string='Room')
+    agreement_id = fields.Many2one('property.agreement', string='Agreement', ondelete='cascade', index=True)
+    collection_id = fields.Many2one('property.collection', string='Collection')
+    currency_id = fields.Many2one('res.currency', string='Currency')
+    archived_on = fields.Datetime(string='Archived On', readonly=True)
+
+    # Reference suffix of the balance row left in the live ledger
+    _CARRY_FORWARD_SUFFIX = 'ARCHIVED'
+
+    @api.model
+    def cron_archive_closed_statements(self, months=24):
+        """Move entries of agreements terminated more than ``months`` ago to the archive"""
+        cutoff = fields.Date.today() - relativedelta(months=months)
+        agreements = self.env['property.agreement'].with_context(active_test=False).search([
+            ('state', '=', 'terminated'),
+            '|',
+            ('termination_date', '<', cutoff),
+            '&', ('termination_date', '=', False), ('end_date', '<', cutoff),
+        ])
+        archived = self.archive_agreements(agreements)
+        _logger.info(f"Archived {archived} statement entries from {len(agreements)} closed agreements")
+        return True
+
+    @api.model
+    def archive_agreements(self, agreements):
+        """Move the live statement entries of agreements into the archive table.
+
+        Each agreement keeps a single carried-forward row holding the net of
+        what was archived, so tenant balances are unchanged. Collections
+        pointing at archived rows are relinked to that row.
+
+        :return: number of statement entries archived
+        """
+        if not agreements:
+            return 0
+        cr = self.env.cr
+        statement_obj = self.env['property.statement']
+        statement_obj.flush_model()
+        self.env['property.collection'].flush_model(['statement_id'])
+
+        # Per agreement: net amount, last and first row dates, row count
+        cr.execute("""
+            SELECT agreement_id, tenant_id,
+                   SUM(COALESCE(debit_amount, 0) - COALESCE(credit_amount, 0)),
+                   MAX(transaction_date),
+                   MIN(transaction_date),
+                   COUNT(*)
+              FROM property_statement
+             WHERE agreement_id = ANY(%s)
+               AND reference NOT LIKE %s
+          GROUP BY agreement_id, tenant_id
+        """, [agreements.ids, f'%/{self._CARRY_FORWARD_SUFFIX}'])
+        groups = cr.fetchall()
+        if not groups:
+            return 0
+
+        # Carry-forward rows go in through the ORM so the ledger engine sees them
+        carry_vals = []
+        for agreement_id, tenant_id, net, last_date, __, count in groups:
+            net = float(net or 0.0)
+            carry_vals.append({
+                'tenant_id': tenant_id,
+                'agreement_id': agreement_id,
+                'transaction_date': last_date,
+                'reference': f"AGR/{agreement_id}/{self._CARRY_FORWARD_SUFFIX}",
+                'description': f"Balance carried forward from {count} archived entries",
+                'transaction_type': 'outstanding',
+                'debit_amount': net if net > 0 else 0.0,
+                'credit_amount': -net if net < 0 else 0.0,
+            })
+        carry_rows = statement_obj.with_context(defer_running_balance=True).insert_or_skip(carry_vals)
+        statement_obj.flush_model()
+
+        # Existing carry-forward rows (re-archiving) absorb the new net instead
+        carry_by_agreement = {}
+        moved_positions = []
+        for vals, stmt_id in zip(carry_vals, carry_rows):
+            if not stmt_id:
+                # The self-join exposes the row as it was before the update
+                cr.execute("""
+                    UPDATE property_statement s
+                       SET debit_amount = GREATEST(s.debit_amount - s.credit_amount + %s, 0),
+                           credit_amount = GREATEST(s.credit_amount - s.debit_amount - %s, 0),
+                           transaction_date = GREATEST(s.transaction_date, %s)
+                      FROM property_statement old
+                     WHERE old.id = s.id
+                       AND s.agreement_id = %s AND s.reference = %s
+                 RETURNING s.id, s.tenant_id, old.transaction_date
+                """, [vals['debit_amount'] - vals['credit_amount'],
+                      vals['debit_amount'] - vals['credit_amount'],
+                      vals['transaction_date'], vals['agreement_id'], vals['reference']])
+                stmt_id, tenant_id, old_date = cr.fetchone()
+                # Rows between the old and new date lose this row's amount
+                moved_positions.append((tenant_id, old_date, stmt_id))
+            carry_by_agreement[vals['agreement_id']] = stmt_id
+        carry_ids = list(carry_by_agreement.values())
+
+        # Relink collections so the backfill cron does not recreate their entries
+        cr.execute("""
+            UPDATE property_collection c
+               SET statement_id = v.carry_id
+              FROM property_statement st
+              JOIN unnest(%s::int[], %s::int[]) AS v(agreement_id, carry_id)
+                ON v.agreement_id = st.agreement_id
+             WHERE c.statement_id = st.id
+               AND st.id != ALL(%s)
+        """, [list(carry_by_agreement), carry_ids, carry_ids])
+
+        cr.execute("""
+            WITH moved AS (
+                DELETE FROM property_statement
+                 WHERE agreement_id = ANY(%s)
+                   AND id != ALL(%s)
+             RETURNING *
+            )
+            INSERT INTO property_statement_archive (
+                original_id, tenant_id, transaction_date, reference, description, transaction_type,
+                debit_amount, credit_amount, running_balance, room_id, agreement_id, collection_id,
+                currency_id, archived_on, create_uid, create_date, write_uid, write_date
+            )
+            SELECT id, tenant_id, transaction_date, reference, description, transaction_type,
+                   debit_amount, credit_amount, running_balance, room_id, agreement_id, collection_id,
+                   currency_id, now() at time zone 'UTC',
+                   %s, now() at time zone 'UTC', %s, now() at time zone 'UTC'
+              FROM moved
+        """, [list(carry_by_agreement), carry_ids, self.env.uid, self.env.uid])
+        archived = cr.rowcount
+
+        statement_obj.invalidate_model()
+        self.env['property.collection'].invalidate_model(['statement_id'])
+
+        # Walk each ledger from the start of the earliest archived day
+        statement_obj._ledger_touch([
+            (tenant_id, first_date, 0)
+            for __, tenant_id, ___, ____, first_date, _____ in groups
+        ] + moved_positions)
+        self.env['property.tenant']._invalidate_statement_totals(list({g[1] for g in groups}))
+        return archived
+
+
+class PropertyStatementHistory(models.Model):
+    """Live and archived statement entries together, for explicit archive lookups"""
+    _name = 'property.statement.history'
+    _description = 'Statement History (including archive)'
+    _auto = False
+    _order = 'transaction_date asc, id asc'
+    _rec_name = 'reference'
+
+    tenant_id = fields.Many2one('property.tenant', string='Tenant', readonly=True)
+    transaction_date = fields.Date(string='Transaction Date', readonly=True)
+    reference = fields.Char(string='Reference', readonly=True)
+    description = fields.Text(string='Description', readonly=True)
+    transaction_type = fields.Selection(
+        lambda self: self.env['property.statement']._fields['transaction_type'].selection,
+        string='Transaction Type', readonly=True)
+    debit_amount = fields.Monetary('Debit', currency_field='currency_id', readonly=True)
+    credit_amount = fields.Monetary('Credit', currency_field='currency_id', readonly=True)
+    room_id = fields.Many2one('property.room', string='Room', readonly=True)
+    agreement_id = fields.Many2one('property.agreement', string='Agreement', readonly=True)
+    collection_id = fields.Many2one('property.collection', string='Collection', readonly=True)
+    currency_id = fields.Many2one('res.currency', string='Currency', readonly=True)
+    is_archived = fields.Boolean(string='Archived', readonly=True)
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        carry_suffix = self.env['property.statement.archive']._CARRY_FORWARD_SUFFIX
+        # Live ids are even and archive ids odd so both halves share one id space.
+        # Carry-forward rows only summarise archived rows, so they are left out
+        # of the live half to avoid counting those amounts twice.
+        self.env.cr.execute(f"""
+            CREATE OR REPLACE VIEW {self._table} AS (
+                SELECT id * 2 AS id, tenant_id, transaction_date, reference, description, transaction_type,
+                       debit_amount, credit_amount, room_id, agreement_id, collection_id, currency_id,
+                       FALSE AS is_archived
+                  FROM property_statement
+                 WHERE agreement_id IS NULL
+                    OR transaction_type != 'outstanding'
+                    OR reference != 'AGR/' || agreement_id || '/{carry_suffix}'
+                 UNION ALL
+                SELECT id * 2 + 1, tenant_id, transaction_date, reference, description, transaction_type,
+                       debit_amount, credit_amount, room_id, agreement_id, collection_id, currency_id,
+                       TRUE AS is_archived
+                  FROM property_statement_archive
+            )
+        """)
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api
+from datetime import timedelta
+
+
+class PropertyStatementSnapshot(models.Model):
+    _name = 'property.statement.snapshot'
+    _description = 'Monthly Statement Closing Balance'
+    _order = 'tenant_id, month desc'
+    _rec_name = 'month'
+
+    tenant_id = fields.Many2one('property.tenant', string='Tenant', required=True, ondelete='cascade', index=True)
+    month = fields.Date(string='Month', required=True, help="First day of the month")
+    debit_amount = fields.Float(string='Debits', digits=(16, 2))
+    credit_amount = fields.Float(string='Credits', digits=(16, 2))
+    closing_balance = fields.Float(string='Closing Balance', digits=(16, 2))
+
+    _sql_constraints = [
+        ('unique_tenant_month', 'UNIQUE(tenant_id, month)',
+         'Only one statement snapshot per tenant and month is allowed!'),
+    ]
+
+    def init(self):
+        # Seed snapshots for ledgers that existed before this table
+        self.env.cr.execute("SELECT 1 FROM property_statement_snapshot LIMIT 1")
+        if not self.env.cr.fetchone():
+            self.env.cr.execute("SELECT DISTINCT tenant_id FROM property_statement WHERE tenant_id IS NOT NULL")
+            tenant_ids = [row[0] for row in self.env.cr.fetchall()]
+            if tenant_ids:
+                self._refresh_snapshots([(tenant_id, None) for tenant_id in tenant_ids])
+
+    @api.model
+    def _refresh_snapshots(self, scopes):
+        """Rebuild snapshots from the month of each tenant's change onward.
+
+        Closing balances are read from the statements' stored running
+        balance, so this must run after the ledger engine has caught up.
+
+        :param scopes: list of (tenant_id, from_date); None rebuilds the tenant
+        """
+        if not scopes:
+            return
+        cr = self.env.cr
+        tenant_ids = [scope[0] for scope in scopes]
+        from_months = [
+            scope[1].replace(day=1) if scope[1] else fields.Date.to_date('0001-01-01')
+            for scope in scopes
+        ]
+        cr.execute("""
+            DELETE FROM property_statement_snapshot snap
+             USING unnest(%s::int[], %s::date[]) AS scope(tenant_id, from_month)
+             WHERE snap.tenant_id = scope.tenant_id
+               AND snap.month >= scope.from_month
+        """, [tenant_ids, from_months])
+        cr.execute("""
+            INSERT INTO property_statement_snapshot (
+                tenant_id, month, debit_amount, credit_amount, closing_balance,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT st.tenant_id,
+                   date_trunc('month', st.transaction_date)::date,
+                   SUM(COALESCE(st.debit_amount, 0)),
+                   SUM(COALESCE(st.credit_amount, 0)),
+                   (array_agg(st.running_balance ORDER BY st.transaction_date DESC, st.id DESC))[1],
+                   %s, now() at time zone 'UTC', %s, now() at time zone 'UTC'
+              FROM property_statement st
+              JOIN unnest(%s::int[], %s::date[]) AS scope(tenant_id, from_month)
+                ON st.tenant_id = scope.tenant_id
+               AND st.transaction_date >= scope.from_month
+          GROUP BY st.tenant_id, date_trunc('month', st.transaction_date)
+        """, [self.env.uid, self.env.uid, tenant_ids, from_months])
+        self.invalidate_model()
+
+    @api.model
+    def get_period_totals(self, tenant_id, date_from, date_to):
+        """Opening balance, debits, credits and closing balance of a period.
+
+        Whole months inside the period are read from snapshots; only the
+        partial months at either end touch statement rows.
+
+        :return: dict with opening_balance, total_debits, total_credits,
+                 closing_balance
+        """
+        cr = self.env.cr
+        self.env['property.statement'].flush_model()
+        self.flush_model()
+        date_from = fields.Date.to_date(date_from)
+        date_to = fields.Date.to_date(date_to)
+        from_month = date_from.replace(day=1)
+        to_month = date_to.replace(day=1)
+
+        # Opening: closing of the last snapshot before the first month,
+        # plus the rows of the first month that fall before date_from
+        cr.execute("""
+            SELECT closing_balance
+              FROM property_statement_snapshot
+             WHERE tenant_id = %s AND month < %s
+          ORDER BY month DESC
+             LIMIT 1
+        """, [tenant_id, from_month])
+        row = cr.fetchone()
+        opening = float(row[0] or 0.0) if row else 0.0
+        opening += self._sum_rows(tenant_id, from_month, date_from - timedelta(days=1))[2]
+
+        # Period movements: full months from snapshots, partial months from rows
+        debits = credits = 0.0
+        first_full = from_month if date_from == from_month else self._next_month(from_month)
+        last_day_of_to_month = self._next_month(to_month) - timedelta(days=1)
+        last_full = to_month if date_to == last_day_of_to_month else to_month - timedelta(days=1)
+
+        if first_full <= last_full:
+            cr.execute("""
+                SELECT COALESCE(SUM(debit_amount), 0), COALESCE(SUM(credit_amount), 0)
+                  FROM property_statement_snapshot
+                 WHERE tenant_id = %s AND month >= %s AND month <= %s
+            """, [tenant_id, first_full, last_full])
+            full_debits, full_credits = cr.fetchone()
+            debits += float(full_debits)
+            credits += float(full_credits)
+            head = (date_from, first_full - timedelta(days=1))
+            tail = (self._next_month(last_full.replace(day=1)), date_to)
+        else:
+            # Period sits inside a single partial month
+            head = (date_from, date_to)
+            tail = None
+
+        for start, end in filter(None, [head, tail]):
+            if start <= end:
+                part_debits, part_credits, __ = self._sum_rows(tenant_id, start, end)
+                debits += part_debits
+                credits += part_credits
+
+        return {
+            'opening_balance': round(opening, 2),
+            'total_debits': round(debits, 2),
+            'total_credits': round(credits, 2),
+            'closing_balance': round(opening + debits - credits, 2),
+        }
+
+    @api.model
+    def _sum_rows(self, tenant_id, date_from, date_to):
+        """Return (debits, credits, debits - credits) of statement rows in a date range"""
+        if date_from > date_to:
+            return 0.0, 0.0, 0.0
+        self.env.cr.execute("""
+            SELECT COALESCE(SUM(debit_amount), 0), COALESCE(SUM(credit_amount), 0)
+              FROM property_statement
+             WHERE tenant_id = %s
+               AND transaction_date >= %s
+               AND transaction_date <= %s
+        """, [tenant_id, date_from, date_to])
+        debits, credits = self.env.cr.fetchone()
+        return float(debits), float(credits), float(debits) - float(credits)
+
+    @api.model
+    def _next_month(self, month_start):
+        """First day of the month after month_start"""
+        return (month_start.replace(day=28) + timedelta(days=4)).replace(day=1)
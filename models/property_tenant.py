@@ -1,5 +1,7 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
+from collections import defaultdict
+from datetime import timedelta
 
 class ResPartner(models.Model):
     _inherit = 'res.partner'
@@ -97,7 +99,7 @@ class PropertyTenant(models.Model):
         ('current', 'Current'),
         ('overdue', 'Overdue'),
         ('critical', 'Critical'),
-    ], string='Outstanding Status', compute='_compute_outstanding_dues', store=True)
+    ], string='Outstanding Status', compute='_compute_outstanding_dues', store=True, index=True)
     
     # Financial
     currency_id = fields.Many2one('res.currency', 'Currency', 
@@ -163,80 +165,150 @@ class PropertyTenant(models.Model):
     
     @api.depends('current_agreement_id', 'collection_ids.amount_collected', 'collection_ids.date', 'collection_ids.status', 'collection_ids.active')
     def _compute_outstanding_dues(self):
-        from datetime import datetime
-        from dateutil.relativedelta import relativedelta
-        
+        """Compute outstanding amounts for the whole recordset at once
+
+        Expected debits, verified collections and last payment dates are read
+        with one grouped query each, then assigned from in-memory dicts.
+        """
+        today = fields.Date.today()
+        # Statement type -> collection type settled against it
+        collection_types = {'rent': 'rent', 'deposit': 'deposit', 'parking': 'parking'}
+
+        agreements = {
+            record._origin.id: record.current_agreement_id
+            for record in self
+            if record._origin.id
+            and record.current_agreement_id
+            and record.current_agreement_id.state == 'active'
+        }
+
+        expected = defaultdict(float)
+        collected = defaultdict(float)
+        last_payment_dates = {}
+        if agreements:
+            tenant_ids = list(agreements)
+            # Calculate expected amounts based on STATEMENT ENTRIES (not complete months)
+            # This ensures the outstanding matches what's actually charged
+            for tenant, agreement, transaction_type, debit in self.env['property.statement']._read_group(
+                [
+                    ('tenant_id', 'in', tenant_ids),
+                    ('agreement_id', 'in', [agreement._origin.id for agreement in agreements.values()]),
+                    ('transaction_type', 'in', list(collection_types)),
+                ],
+                ['tenant_id', 'agreement_id', 'transaction_type'],
+                ['debit_amount:sum'],
+            ):
+                if agreements[tenant.id]._origin == agreement:
+                    expected[(tenant.id, transaction_type)] += debit or 0.0
+
+            # ONLY VERIFIED COLLECTIONS
+            collection_domain = [
+                ('tenant_id', 'in', tenant_ids),
+                ('active', '=', True),
+                ('status', '=', 'verified'),
+            ]
+            for tenant, collection_type, amount in self.env['property.collection']._read_group(
+                collection_domain + [('collection_type', 'in', list(collection_types.values()))],
+                ['tenant_id', 'collection_type'],
+                ['amount_collected:sum'],
+            ):
+                collected[(tenant.id, collection_type)] += amount or 0.0
+            last_payment_dates = {
+                tenant.id: last_date
+                for tenant, last_date in self.env['property.collection']._read_group(
+                    collection_domain, ['tenant_id'], ['date:max'],
+                )
+            }
+
         for record in self:
-            if not record.current_agreement_id or record.current_agreement_id.state != 'active':
+            agreement = agreements.get(record._origin.id)
+            if not agreement:
                 record.total_outstanding_dues = 0
                 record.rent_outstanding = 0
                 record.deposit_outstanding = 0
                 record.parking_outstanding = 0
                 record.outstanding_status = 'current'
                 continue
-            
-            agreement = record.current_agreement_id
-            today = fields.Date.today()
-            
-            # Calculate expected rent based on STATEMENT ENTRIES (not complete months)
-            # This ensures the outstanding matches what's actually charged
-            rent_statements = self.env['property.statement'].search([
-                ('tenant_id', '=', record.id),
-                ('agreement_id', '=', agreement.id),
-                ('transaction_type', '=', 'rent')
-            ])
-            expected_rent = sum(rent_statements.mapped('debit_amount'))
-            
-            # Calculate total rent collected - ONLY VERIFIED COLLECTIONS
-            active_collections = record.collection_ids.filtered(lambda c: c.active and c.status == 'verified')
-            rent_collections = active_collections.filtered(lambda c: c.collection_type == 'rent')
-            total_rent_collected = sum(rent_collections.mapped('amount_collected'))
-            
-            rent_outstanding = max(0, expected_rent - total_rent_collected)
-            
-            # Calculate deposit outstanding
-            deposit_statements = self.env['property.statement'].search([
-                ('tenant_id', '=', record.id),
-                ('agreement_id', '=', agreement.id),
-                ('transaction_type', '=', 'deposit')
-            ])
-            expected_deposit = sum(deposit_statements.mapped('debit_amount'))
-            
-            deposit_collections = active_collections.filtered(lambda c: c.collection_type == 'deposit')
-            total_deposit_collected = sum(deposit_collections.mapped('amount_collected'))
-            deposit_outstanding = max(0, expected_deposit - total_deposit_collected)
-            
-            # Calculate parking outstanding
-            parking_statements = self.env['property.statement'].search([
-                ('tenant_id', '=', record.id),
-                ('agreement_id', '=', agreement.id),
-                ('transaction_type', '=', 'parking')
-            ])
-            expected_parking = sum(parking_statements.mapped('debit_amount'))
-            
-            parking_collections = active_collections.filtered(lambda c: c.collection_type == 'parking')
-            total_parking_collected = sum(parking_collections.mapped('amount_collected'))
-            parking_outstanding = max(0, expected_parking - total_parking_collected)
-            
-            # Total outstanding
-            total_outstanding = rent_outstanding + deposit_outstanding + parking_outstanding
-            
+
+            outstanding = {
+                transaction_type: max(0, expected[(record._origin.id, transaction_type)]
+                                      - collected[(record._origin.id, collection_type)])
+                for transaction_type, collection_type in collection_types.items()
+            }
+            total_outstanding = sum(outstanding.values())
+
             # Calculate status based on last payment
-            last_payment_date = max(active_collections.mapped('date')) if active_collections else agreement.start_date
+            last_payment_date = last_payment_dates.get(record._origin.id) or agreement.start_date
             days_overdue = (today - last_payment_date).days if last_payment_date else 0
-            
+
             if total_outstanding <= 0:
                 outstanding_status = 'current'
-            elif days_overdue <= 90:
+            elif days_overdue <= self._CRITICAL_AFTER_DAYS:
                 outstanding_status = 'overdue'
             else:
                 outstanding_status = 'critical'
-            
+
             record.total_outstanding_dues = total_outstanding
-            record.rent_outstanding = rent_outstanding
-            record.deposit_outstanding = deposit_outstanding
-            record.parking_outstanding = parking_outstanding
+            record.rent_outstanding = outstanding['rent']
+            record.deposit_outstanding = outstanding['deposit']
+            record.parking_outstanding = outstanding['parking']
             record.outstanding_status = outstanding_status
+
+    # Days since the last verified payment after which overdue becomes critical
+    _CRITICAL_AFTER_DAYS = 90
+
+    @api.model
+    def _rollover_outstanding_status(self, last_run, today):
+        """Move overdue tenants to critical once their last payment ages past the threshold
+
+        Mirrors the status rule of _compute_outstanding_dues for tenants whose
+        amounts did not change: only those whose last verified payment (or
+        current agreement start) crossed the threshold between ``last_run``
+        and ``today`` are updated.
+
+        :return: number of tenants updated
+        """
+        cutoff = today - timedelta(days=self._CRITICAL_AFTER_DAYS)
+        lower = last_run - timedelta(days=self._CRITICAL_AFTER_DAYS) if last_run else None
+
+        # The crossing test runs in the UPDATE itself: the last payment date
+        # (or current agreement start) is only resolved for overdue tenants
+        self.flush_model(['outstanding_status', 'total_outstanding_dues', 'active'])
+        self.env['property.collection'].flush_model(['tenant_id', 'date', 'status', 'active'])
+        self.env['property.agreement'].flush_model(['tenant_id', 'state', 'start_date', 'active'])
+        self.env.cr.execute("""
+            UPDATE property_tenant t
+               SET outstanding_status = 'critical'
+              FROM (
+                  SELECT t2.id,
+                         COALESCE(
+                             (SELECT max(c.date)
+                                FROM property_collection c
+                               WHERE c.tenant_id = t2.id
+                                 AND c.status = 'verified'
+                                 AND c.active),
+                             (SELECT a.start_date
+                                FROM property_agreement a
+                               WHERE a.tenant_id = t2.id
+                                 AND a.state = 'active'
+                                 AND a.active
+                            ORDER BY a.start_date DESC
+                               LIMIT 1)
+                         ) AS last_paid
+                    FROM property_tenant t2
+                   WHERE t2.outstanding_status = 'overdue'
+                     AND t2.total_outstanding_dues > 0
+                     AND t2.active
+              ) p
+             WHERE t.id = p.id
+               AND p.last_paid < %s
+               AND (%s::date IS NULL OR p.last_paid >= %s::date)
+         RETURNING t.id
+        """, [cutoff, lower, lower])
+        tenant_ids = [row[0] for row in self.env.cr.fetchall()]
+        self.browse(tenant_ids).invalidate_recordset(['outstanding_status'])
+        return len(tenant_ids)
+
     # @api.depends('current_agreement_id', 'collection_ids.amount_collected', 'collection_ids.date', 'collection_ids.active')
     # def _compute_outstanding_dues(self):
     #     from datetime import datetime
@@ -488,22 +560,11 @@ class PropertyTenant(models.Model):
             ('statement_id', '=', False)  # Collections missing statement entries
         ])
         
-        count_collections_fixed = 0
-        for collection in collections_needing_statements:
-            try:
-                statement = self.env['property.statement'].create_from_collection(collection)
-                collection.statement_id = statement.id
-                count_collections_fixed += 1
-            except Exception as e:
-                import logging
-                _logger = logging.getLogger(__name__)
-                _logger.warning(f"Could not create statement for collection {collection.name}: {str(e)}")
+        # One insert-or-skip batch; references that already exist are skipped
+        count_collections_fixed, __ = collections_needing_statements._create_statements_bulk()
         
         # Recalculate running balances for ALL statements
-        all_statements = self.env['property.statement'].search([
-            ('tenant_id', '=', self.id)
-        ], order='transaction_date asc, id asc')
-        all_statements._compute_running_balance()
+        self.env['property.statement'].rebuild_running_balances([self.id])
         
         message = _('Recalculated %d invoice statements.') % count_deleted
         if count_collections_fixed > 0:
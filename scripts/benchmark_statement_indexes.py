@@ -0,0 +1,88 @@
+"""
+Benchmark the statement ledger's composite indexes.
+
+Seeds a temporary copy of property_statement, prints the planner cost of each
+hot query shape without and with the indexes declared in
+PropertyStatement._LEDGER_INDEXES, then reports the index advisor's view of
+the real table. Nothing is written: the transaction is rolled back at the end.
+
+Usage (Odoo shell):
+    ./odoo-bin shell -c /path/to/odoo.conf -d your_database_name < benchmark_statement_indexes.py
+"""
+
+import json
+
+TENANTS = 2000
+AGREEMENTS_PER_TENANT = 2
+MONTHS = 60
+
+# (label, query against the bench table)
+QUERY_SHAPES = [
+    ("tenant + agreement + type",
+     "SELECT SUM(debit_amount) FROM bench_statement "
+     "WHERE tenant_id = 42 AND agreement_id = 84 AND transaction_type = 'rent'"),
+    ("agreement + type + date",
+     "SELECT id FROM bench_statement "
+     "WHERE agreement_id = 84 AND transaction_type = 'rent' AND transaction_date = '2023-06-01'"),
+    ("agreement + reference",
+     "SELECT id FROM bench_statement "
+     "WHERE agreement_id = 84 AND reference = 'AGR/84/RENT/202306'"),
+    ("tenant ledger suffix ordered by (date, id)",
+     "SELECT id, debit_amount, credit_amount FROM bench_statement "
+     "WHERE tenant_id = 42 AND (transaction_date, id) >= ('2024-01-01', 0) "
+     "ORDER BY transaction_date, id"),
+]
+
+
+def plan_cost(cr, query):
+    cr.execute("EXPLAIN (FORMAT JSON) " + query)
+    plan = cr.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']['Total Cost']
+
+
+def run(env):
+    cr = env.cr
+    statement_model = env['property.statement']
+
+    cr.execute("CREATE TEMP TABLE bench_statement (LIKE property_statement INCLUDING DEFAULTS)")
+    cr.execute("""
+        INSERT INTO bench_statement (id, tenant_id, agreement_id, transaction_type, reference,
+                                     transaction_date, debit_amount, credit_amount)
+        SELECT row_number() OVER (),
+               t, t * 2 + a,
+               (ARRAY['rent', 'parking', 'other'])[1 + (m %% 3)],
+               'AGR/' || (t * 2 + a) || '/RENT/' || to_char(DATE '2020-01-01' + (m || ' month')::interval, 'YYYYMM'),
+               (DATE '2020-01-01' + (m || ' month')::interval)::date,
+               1000, CASE WHEN m %% 2 = 0 THEN 1000 ELSE 0 END
+          FROM generate_series(1, %s) AS t,
+               generate_series(0, %s) AS a,
+               generate_series(0, %s) AS m
+    """, [TENANTS, AGREEMENTS_PER_TENANT - 1, MONTHS - 1])
+    cr.execute("ANALYZE bench_statement")
+    cr.execute("SELECT COUNT(*) FROM bench_statement")
+    print(f"Seeded {cr.fetchone()[0]} rows")
+
+    before = [plan_cost(cr, query) for __, query in QUERY_SHAPES]
+
+    for index_name, columns in statement_model._LEDGER_INDEXES:
+        cr.execute(f"CREATE INDEX bench_{index_name} ON bench_statement ({', '.join(columns)})")
+    cr.execute("ANALYZE bench_statement")
+
+    after = [plan_cost(cr, query) for __, query in QUERY_SHAPES]
+
+    print(f"{'Query shape':<45} | {'Before':>12} | {'After':>12}")
+    print("-" * 76)
+    for (label, __), cost_before, cost_after in zip(QUERY_SHAPES, before, after):
+        print(f"{label:<45} | {cost_before:>12.2f} | {cost_after:>12.2f}")
+
+    print("\nIndex advisor on property_statement:")
+    for advice in statement_model.check_ledger_indexes(log=False):
+        status = advice['covered_by'] or 'MISSING'
+        print(f"  ({', '.join(advice['columns'])}) -> {status}")
+
+    cr.rollback()
+
+
+run(env)
@@ -4,4 +4,6 @@ from . import agreement_clean_wizard
 
 from . import property_data_import_wizard
 from . import property_statement_wizard
-from . import property_deposit_adjust_wizard
\ No newline at end of file
+from . import property_deposit_adjust_wizard
+from . import property_collection_bulk_wizard
+from . import property_outstanding_projection_wizard
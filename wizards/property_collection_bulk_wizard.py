@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+
+
+class PropertyCollectionBulkWizard(models.TransientModel):
+    _name = 'property.collection.bulk.wizard'
+    _description = 'Bulk Collection Posting'
+
+    date = fields.Date('Collection Date', default=fields.Date.today, required=True)
+    status = fields.Selection([
+        ('collected', 'Collected'),
+        ('verified', 'Verified'),
+    ], string='Post As', default='collected', required=True)
+    line_ids = fields.One2many('property.collection.bulk.wizard.line', 'wizard_id', string='Collections')
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('done', 'Posted'),
+    ], default='draft')
+
+    posted_count = fields.Integer('Posted', compute='_compute_counts')
+    error_count = fields.Integer('Rejected', compute='_compute_counts')
+
+    @api.depends('line_ids.collection_id', 'line_ids.error')
+    def _compute_counts(self):
+        for wizard in self:
+            wizard.posted_count = len(wizard.line_ids.filtered('collection_id'))
+            wizard.error_count = len(wizard.line_ids.filtered('error'))
+
+    def action_post(self):
+        self.ensure_one()
+        lines = self.line_ids.filtered(lambda l: not l.collection_id)
+        if not lines:
+            raise UserError(_('There are no collections left to post.'))
+
+        vals_list = [line._prepare_collection_vals() for line in lines]
+        result = self.env['property.collection'].post_bulk(vals_list)
+
+        for index, line in enumerate(lines):
+            line.write({
+                'collection_id': result['collection_ids'][index],
+                'error': result['errors'].get(index, False),
+            })
+        self.state = 'done'
+
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    def action_view_collections(self):
+        self.ensure_one()
+        return {
+            'name': _('Posted Collections'),
+            'type': 'ir.actions.act_window',
+            'res_model': 'property.collection',
+            'view_mode': 'list,form',
+            'domain': [('id', 'in', self.line_ids.collection_id.ids)],
+        }
+
+
+class PropertyCollectionBulkWizardLine(models.TransientModel):
+    _name = 'property.collection.bulk.wizard.line'
+    _description = 'Bulk Collection Posting Line'
+
+    wizard_id = fields.Many2one('property.collection.bulk.wizard', required=True, ondelete='cascade')
+    tenant_id = fields.Many2one('property.tenant', 'Tenant', required=True)
+    collection_type = fields.Selection(
+        lambda self: self.env['property.collection']._fields['collection_type'].selection,
+        string='Collection Type', required=True, default='rent')
+    amount_collected = fields.Float('Amount', digits=(16, 2))
+    payment_method = fields.Selection(
+        lambda self: self.env['property.collection']._fields['payment_method'].selection,
+        string='Payment Method', required=True, default='cash')
+    reference_number = fields.Char('Reference Number')
+    notes = fields.Char('Notes')
+
+    collection_id = fields.Many2one('property.collection', 'Collection', readonly=True)
+    error = fields.Char('Error', readonly=True)
+
+    def _prepare_collection_vals(self):
+        self.ensure_one()
+        vals = {
+            'tenant_id': self.tenant_id.id,
+            'date': self.wizard_id.date,
+            'collection_type': self.collection_type,
+            'payment_method': self.payment_method,
+            'reference_number': self.reference_number,
+            'notes': self.notes,
+            'status': self.wizard_id.status,
+        }
+        # Leave the amount out so the agreement amount is used
+        if self.amount_collected:
+            vals['amount_collected'] = self.amount_collected
+        if self.wizard_id.status == 'verified':
+            vals.update({
+                'verified_by': self.env.user.id,
+                'verification_date': fields.Datetime.now(),
+            })
+        return vals
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+from odoo.tools import date_utils
+
+
+class PropertyOutstandingProjectionWizard(models.TransientModel):
+    _name = 'property.outstanding.projection.wizard'
+    _description = 'Outstanding Dues Projection'
+
+    target_date = fields.Date('Project To', required=True,
+                              default=lambda self: date_utils.end_of(fields.Date.today(), 'month'))
+    scenario = fields.Selection([
+        ('nobody_pays', 'Nobody Pays'),
+        ('pay_by_day', 'Everyone Pays By Day'),
+    ], string='Scenario', default='nobody_pays', required=True)
+    pay_by_day = fields.Integer('Pay By Day', default=5)
+    property_ids = fields.Many2many('property.property', string='Properties',
+                                    help="Leave empty to project the whole portfolio")
+    currency_id = fields.Many2one('res.currency', default=lambda self: self.env.company.currency_id)
+
+    line_ids = fields.One2many('property.outstanding.projection.wizard.line', 'wizard_id', string='Projection')
+    amount_total = fields.Monetary('Projected Outstanding', currency_field='currency_id', readonly=True)
+
+    @api.constrains('pay_by_day')
+    def _check_pay_by_day(self):
+        for wizard in self:
+            if wizard.scenario == 'pay_by_day' and not 1 <= wizard.pay_by_day <= 31:
+                raise ValidationError(_('Pay By Day must be between 1 and 31.'))
+
+    def action_project(self):
+        self.ensure_one()
+        result = self.env['property.outstanding.dues'].project_outstanding(
+            self.target_date,
+            pay_by_day=self.pay_by_day if self.scenario == 'pay_by_day' else None,
+            property_ids=self.property_ids.ids,
+        )
+        lines = [(5, 0, 0)]
+        for row in sorted(result['by_property'], key=lambda row: row['property_name']):
+            buckets = row['by_bucket']
+            lines.append((0, 0, {
+                'property_id': row['property_id'] or False,
+                'amount_current': buckets.get('current', 0.0),
+                'amount_overdue_30': buckets.get('overdue_30', 0.0),
+                'amount_overdue_60': buckets.get('overdue_60', 0.0),
+                'amount_overdue_90': buckets.get('overdue_90', 0.0),
+                'amount_overdue_90plus': buckets.get('overdue_90plus', 0.0),
+                'amount_critical': buckets.get('critical', 0.0),
+                'amount_total': row['total'],
+            }))
+        self.write({'line_ids': lines, 'amount_total': result['total']})
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+
+class PropertyOutstandingProjectionWizardLine(models.TransientModel):
+    _name = 'property.outstanding.projection.wizard.line'
+    _description = 'Outstanding Dues Projection Line'
+    _order = 'amount_total desc'
+
+    wizard_id = fields.Many2one('property.outstanding.projection.wizard', required=True, ondelete='cascade')
+    property_id = fields.Many2one('property.property', 'Property')
+    currency_id = fields.Many2one(related='wizard_id.currency_id')
+    amount_current = fields.Monetary('Not Yet Due', currency_field='currency_id')
+    amount_overdue_30 = fields.Monetary('1-30 Days', currency_field='currency_id')
+    amount_overdue_60 = fields.Monetary('31-60 Days', currency_field='currency_id')
+    amount_overdue_90 = fields.Monetary('61-90 Days', currency_field='currency_id')
+    amount_overdue_90plus = fields.Monetary('91-180 Days', currency_field='currency_id')
+    amount_critical = fields.Monetary('180+ Days', currency_field='currency_id')
+    amount_total = fields.Monetary('Total', currency_field='currency_id')
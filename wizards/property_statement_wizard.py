@@ -1,40 +1,97 @@
 # -*- coding: utf-8 -*-
 
-from odoo import models, fields, api
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
 from datetime import datetime, timedelta
+import csv
+import io
+import re
+import tempfile
+import zipfile
+
+import xlsxwriter
 
 
 class PropertyStatementWizard(models.TransientModel):
     _name = 'property.statement.wizard'
     _description = 'Statement Report Generator'
 
-    tenant_id = fields.Many2one('property.tenant', string='Tenant', required=True)
-    date_from = fields.Date(string='From Date', required=True, 
+    # Rows pulled per FETCH from the server-side export cursor
+    _EXPORT_FETCH_SIZE = 2000
+    # Tenants rendered to PDF before the ORM cache is dropped
+    _EXPORT_PDF_BATCH_SIZE = 20
+    # Rows per worksheet, header included; Excel cannot open larger sheets
+    _XLSX_MAX_ROWS = 1048576
+
+    _EXPORT_HEADERS = [
+        'Tenant', 'Date', 'Reference', 'Description', 'Type',
+        'Debit', 'Credit', 'Running Balance', 'Room',
+    ]
+
+    output = fields.Selection([
+        ('screen', 'Display On Screen'),
+        ('export', 'Export Archive'),
+    ], string='Output', default='screen', required=True)
+
+    tenant_id = fields.Many2one('property.tenant', string='Tenant')
+    date_from = fields.Date(string='From Date', required=True,
                            default=lambda self: fields.Date.today().replace(day=1))
     date_to = fields.Date(string='To Date', required=True, default=fields.Date.today)
-    
+
     report_type = fields.Selection([
         ('detailed', 'Detailed Statement'),
         ('summary', 'Summary Only'),
     ], string='Report Type', default='detailed', required=True)
-    
+
     include_zero_transactions = fields.Boolean(string='Include Zero Amount Transactions', default=False)
 
+    # Bulk export
+    tenant_ids = fields.Many2many('property.tenant', string='Tenants',
+                                  help="Leave empty to export every tenant with entries in the selected property")
+    property_id = fields.Many2one('property.property', string='Property')
+    export_format = fields.Selection([
+        ('xlsx', 'Excel (XLSX)'),
+        ('csv', 'CSV'),
+        ('pdf', 'PDF (one file per tenant)'),
+    ], string='Export Format', default='xlsx')
+
+    # Period totals, served from monthly snapshots
+    opening_balance = fields.Float(string='Opening Balance', digits=(16, 2), compute='_compute_period_totals')
+    total_debits = fields.Float(string='Total Debits', digits=(16, 2), compute='_compute_period_totals')
+    total_credits = fields.Float(string='Total Credits', digits=(16, 2), compute='_compute_period_totals')
+    closing_balance = fields.Float(string='Closing Balance', digits=(16, 2), compute='_compute_period_totals')
+
+    @api.depends('tenant_id', 'date_from', 'date_to')
+    def _compute_period_totals(self):
+        snapshot_obj = self.env['property.statement.snapshot']
+        for wizard in self:
+            if wizard.tenant_id and wizard.date_from and wizard.date_to and wizard.date_from <= wizard.date_to:
+                totals = snapshot_obj.get_period_totals(wizard.tenant_id.id, wizard.date_from, wizard.date_to)
+            else:
+                totals = {}
+            wizard.opening_balance = totals.get('opening_balance', 0.0)
+            wizard.total_debits = totals.get('total_debits', 0.0)
+            wizard.total_credits = totals.get('total_credits', 0.0)
+            wizard.closing_balance = totals.get('closing_balance', 0.0)
+
     def action_generate_report(self):
         """Generate and display the statement report"""
         self.ensure_one()
-        
+
+        if not self.tenant_id:
+            raise UserError(_("Please select a tenant."))
+
         domain = [
             ('tenant_id', '=', self.tenant_id.id),
             ('transaction_date', '>=', self.date_from),
             ('transaction_date', '<=', self.date_to),
         ]
-        
+
         if not self.include_zero_transactions:
             domain.append('|')
             domain.append(('debit_amount', '!=', 0))
             domain.append(('credit_amount', '!=', 0))
-        
+
         if self.report_type == 'detailed':
             return {
                 'name': f'Statement - {self.tenant_id.name} ({self.date_from} to {self.date_to})',
@@ -59,4 +116,266 @@ class PropertyStatementWizard(models.TransientModel):
                     'search_default_tenant_id': self.tenant_id.id,
                 },
                 'target': 'current',
-            }
\ No newline at end of file
+            }
+
+    # ========== BULK EXPORT ==========
+
+    def action_export_statements(self):
+        """Export statements of many tenants into a single zip archive.
+
+        Rows are streamed from a server-side cursor and written incrementally,
+        PDFs are rendered tenant by tenant in batches, so memory stays flat
+        regardless of ledger size.
+        """
+        self.ensure_one()
+
+        if self.date_from > self.date_to:
+            raise UserError(_("From Date must be before To Date."))
+
+        tenant_ids = self._get_export_tenant_ids()
+        if not tenant_ids:
+            raise UserError(_("No statement entries match the selected tenants, property and period."))
+
+        with tempfile.TemporaryFile() as archive_file:
+            with zipfile.ZipFile(archive_file, 'w', zipfile.ZIP_DEFLATED) as archive:
+                if self.export_format == 'pdf':
+                    self._export_pdf(archive, tenant_ids)
+                elif self.export_format == 'csv':
+                    self._export_csv(archive, tenant_ids)
+                else:
+                    self._export_xlsx(archive, tenant_ids)
+            attachment = self._create_archive_attachment(
+                f"statements_{self.date_from.strftime('%Y%m%d')}_{self.date_to.strftime('%Y%m%d')}.zip",
+                archive_file,
+            )
+
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/web/content/{attachment.id}?download=true',
+            'target': 'self',
+        }
+
+    def _create_archive_attachment(self, name, archive_file):
+        """Attach the finished archive through the regular attachment API"""
+        archive_file.seek(0)
+        return self.env['ir.attachment'].create({
+            'name': name,
+            'type': 'binary',
+            'raw': archive_file.read(),
+            'mimetype': 'application/zip',
+            'res_model': self._name,
+            'res_id': self.id,
+        })
+
+    def _get_export_tenant_ids(self):
+        """Tenants to export: the explicit selection, else everyone with entries in the scope"""
+        if self.tenant_ids:
+            return self.tenant_ids.sorted('name').ids
+        if self.tenant_id and not self.property_id:
+            return self.tenant_id.ids
+        if not self.property_id:
+            raise UserError(_("Select tenants or a property to export."))
+
+        where, params = self._export_where(None)
+        self.env['property.statement'].flush_model()
+        self.env.cr.execute(f"""
+            SELECT t.id
+              FROM property_tenant t
+             WHERE EXISTS (
+                    SELECT 1
+                      FROM property_statement st
+                 LEFT JOIN property_room r ON r.id = st.room_id
+                     WHERE st.tenant_id = t.id AND {where}
+                   )
+          ORDER BY t.name, t.id
+        """, params)
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    def _export_where(self, tenant_ids):
+        """SQL filter on statement rows (aliased st, room aliased r) for the wizard scope"""
+        clauses = ["st.transaction_date >= %s", "st.transaction_date <= %s"]
+        params = [self.date_from, self.date_to]
+        if tenant_ids is not None:
+            clauses.append("st.tenant_id = ANY(%s)")
+            params.append(list(tenant_ids))
+        if self.property_id:
+            clauses.append("r.property_id = %s")
+            params.append(self.property_id.id)
+        if not self.include_zero_transactions:
+            clauses.append("(st.debit_amount != 0 OR st.credit_amount != 0)")
+        return " AND ".join(clauses), params
+
+    def _stream_statement_rows(self, tenant_ids):
+        """Yield export rows through a server-side cursor, one FETCH at a time"""
+        cr = self.env.cr
+        self.env['property.statement'].flush_model()
+        type_labels = dict(
+            self.env['property.statement']._fields['transaction_type']._description_selection(self.env)
+        )
+        where, params = self._export_where(tenant_ids)
+        cr.execute(f"""
+            DECLARE property_statement_export NO SCROLL CURSOR FOR
+                SELECT t.name, st.transaction_date, st.reference, st.description, st.transaction_type,
+                       st.debit_amount, st.credit_amount, st.running_balance, r.name
+                  FROM property_statement st
+                  JOIN property_tenant t ON t.id = st.tenant_id
+             LEFT JOIN property_room r ON r.id = st.room_id
+                 WHERE {where}
+              ORDER BY t.name, st.tenant_id, st.transaction_date, st.id
+        """, params)
+        try:
+            while True:
+                cr.execute("FETCH %s FROM property_statement_export", [self._EXPORT_FETCH_SIZE])
+                rows = cr.fetchall()
+                if not rows:
+                    break
+                for tenant, tx_date, reference, description, tx_type, debit, credit, balance, room in rows:
+                    yield [
+                        tenant,
+                        tx_date,
+                        reference,
+                        description or '',
+                        type_labels.get(tx_type, tx_type),
+                        float(debit or 0.0),
+                        float(credit or 0.0),
+                        float(balance or 0.0),
+                        room or '',
+                    ]
+        finally:
+            cr.execute("CLOSE property_statement_export")
+
+    def _export_csv(self, archive, tenant_ids):
+        with archive.open('statements.csv', 'w') as member:
+            stream = io.TextIOWrapper(member, encoding='utf-8', newline='')
+            writer = csv.writer(stream)
+            writer.writerow(self._EXPORT_HEADERS)
+            for row in self._stream_statement_rows(tenant_ids):
+                row[1] = fields.Date.to_string(row[1])
+                writer.writerow(row)
+            stream.flush()
+            stream.detach()
+
+    def _export_xlsx(self, archive, tenant_ids):
+        with tempfile.NamedTemporaryFile(suffix='.xlsx') as xlsx_file:
+            # constant_memory flushes each row to disk as soon as it is written
+            workbook = xlsxwriter.Workbook(xlsx_file.name, {'constant_memory': True})
+            bold = workbook.add_format({'bold': True})
+            date_format = workbook.add_format({'num_format': 'yyyy-mm-dd'})
+            money_format = workbook.add_format({'num_format': '#,##0.00'})
+
+            sheet, row_index = None, self._XLSX_MAX_ROWS
+            for row in self._stream_statement_rows(tenant_ids):
+                if row_index >= self._XLSX_MAX_ROWS:
+                    # Roll over to a new sheet instead of dropping rows past the limit
+                    sheet_number = len(workbook.worksheets()) + 1
+                    sheet = workbook.add_worksheet('Statements' if sheet_number == 1 else f'Statements {sheet_number}')
+                    sheet.write_row(0, 0, self._EXPORT_HEADERS, bold)
+                    row_index = 1
+                sheet.write_string(row_index, 0, row[0] or '')
+                sheet.write_datetime(row_index, 1, datetime.combine(row[1], datetime.min.time()), date_format)
+                sheet.write_string(row_index, 2, row[2] or '')
+                sheet.write_string(row_index, 3, row[3])
+                sheet.write_string(row_index, 4, row[4] or '')
+                sheet.write_number(row_index, 5, row[5], money_format)
+                sheet.write_number(row_index, 6, row[6], money_format)
+                sheet.write_number(row_index, 7, row[7], money_format)
+                sheet.write_string(row_index, 8, row[8])
+                row_index += 1
+            if sheet is None:
+                workbook.add_worksheet('Statements').write_row(0, 0, self._EXPORT_HEADERS, bold)
+            workbook.close()
+            archive.write(xlsx_file.name, 'statements.xlsx')
+
+    def _export_pdf(self, archive, tenant_ids):
+        report = self.env.ref('property_management_lite.action_report_tenant_statement')
+        data = {
+            'date_from': fields.Date.to_string(self.date_from),
+            'date_to': fields.Date.to_string(self.date_to),
+            'property_id': self.property_id.id or False,
+            'include_zero_transactions': self.include_zero_transactions,
+        }
+        report_obj = self.env['ir.actions.report']
+        for start in range(0, len(tenant_ids), self._EXPORT_PDF_BATCH_SIZE):
+            for tenant in self.env['property.tenant'].browse(tenant_ids[start:start + self._EXPORT_PDF_BATCH_SIZE]):
+                pdf_content, __ = report_obj._render_qweb_pdf(report, [tenant.id], data=data)
+                safe_name = re.sub(r'[^\w\-]+', '_', tenant.name or 'tenant').strip('_')
+                archive.writestr(f"{safe_name}_{tenant.id}.pdf", pdf_content)
+            # Drop the batch's records from the cache before the next one
+            self.env.invalidate_all()
+
+    # ========== END BULK EXPORT ==========
+
+
+class ReportTenantStatement(models.AbstractModel):
+    _name = 'report.property_management_lite.report_tenant_statement'
+    _description = 'Tenant Statement of Account Report'
+
+    @api.model
+    def _get_report_values(self, docids, data=None):
+        data = data or {}
+        tenants = self.env['property.tenant'].browse(docids)
+        date_to = fields.Date.to_date(data.get('date_to')) or fields.Date.today()
+        date_from = fields.Date.to_date(data.get('date_from')) or date_to.replace(day=1)
+
+        domain = [
+            ('tenant_id', 'in', tenants.ids),
+            ('transaction_date', '>=', date_from),
+            ('transaction_date', '<=', date_to),
+        ]
+        if data.get('property_id'):
+            domain.append(('room_id.property_id', '=', data['property_id']))
+        if not data.get('include_zero_transactions'):
+            domain += ['|', ('debit_amount', '!=', 0), ('credit_amount', '!=', 0)]
+
+        lines_by_tenant = {tenant.id: [] for tenant in tenants}
+        for stmt in self.env['property.statement'].search(domain, order='transaction_date asc, id asc'):
+            lines_by_tenant[stmt.tenant_id.id].append(stmt)
+
+        if data.get('property_id'):
+            # Snapshots cover a tenant's whole ledger; total the same filtered rows instead
+            totals_by_tenant = self._get_property_totals(tenants, data['property_id'], date_from, date_to)
+        else:
+            snapshot_obj = self.env['property.statement.snapshot']
+            totals_by_tenant = {
+                tenant.id: snapshot_obj.get_period_totals(tenant.id, date_from, date_to)
+                for tenant in tenants
+            }
+
+        return {
+            'doc_ids': tenants.ids,
+            'doc_model': 'property.tenant',
+            'docs': tenants,
+            'date_from': date_from,
+            'date_to': date_to,
+            'lines_by_tenant': lines_by_tenant,
+            'totals_by_tenant': totals_by_tenant,
+        }
+
+    @api.model
+    def _get_property_totals(self, tenants, property_id, date_from, date_to):
+        """Period totals of each tenant, limited to statement rows of one property"""
+        statement_obj = self.env['property.statement']
+        scope = [('tenant_id', 'in', tenants.ids), ('room_id.property_id', '=', property_id)]
+        aggregates = ['debit_amount:sum', 'credit_amount:sum']
+        opening = {
+            tenant.id: debit - credit
+            for tenant, debit, credit in statement_obj._read_group(
+                scope + [('transaction_date', '<', date_from)], ['tenant_id'], aggregates)
+        }
+        movements = {
+            tenant.id: (debit, credit)
+            for tenant, debit, credit in statement_obj._read_group(
+                scope + [('transaction_date', '>=', date_from), ('transaction_date', '<=', date_to)],
+                ['tenant_id'], aggregates)
+        }
+        totals = {}
+        for tenant in tenants:
+            opening_balance = opening.get(tenant.id, 0.0)
+            debits, credits = movements.get(tenant.id, (0.0, 0.0))
+            totals[tenant.id] = {
+                'opening_balance': opening_balance,
+                'total_debits': debits,
+                'total_credits': credits,
+                'closing_balance': opening_balance + debits - credits,
+            }
+        return totals